@@ -43,6 +43,9 @@ endfunction
 function! s:Enabled() abort
   if !s:Initialised()
     let s:enabled = vimspector#internal#state#Reset()
+  elseif s:enabled
+    " The g:vimspector_ settings might have changed since we last read them
+    py3 __import__( 'vimspector', fromlist = [ 'settings' ] ).settings.Refresh()
   endif
 
   return s:enabled
@@ -541,7 +544,7 @@ function! vimspector#GetConfigurations() abort
     return
   endif
   let configurations = py3eval(
-        \ 'list( _vimspector_session.GetConfigurations( {} )[ 1 ].keys() )'
+        \ '_vimspector_session.GetConfigurationNames()'
         \ . ' if _vimspector_session else []' )
   return configurations
 endfunction
@@ -746,6 +749,36 @@ function! vimspector#OnBufferCreated( file_name ) abort
   py3 _vimspector_session.RefreshSigns()
 endfunction
 
+function! vimspector#OnConfigFileWritten() abort
+  " If python isn't loaded yet, there's nothing cached
+  if !s:Initialised()
+    return
+  endif
+
+  py3 __import__( 'vimspector', fromlist = [ 'utils' ] )
+        \ .utils.InvalidateConfigFileCache()
+endfunction
+
+function! vimspector#OnVimLeave() abort
+  " If python isn't loaded yet, there are no warm adapters to stop
+  if !s:Initialised()
+    return
+  endif
+
+  py3 __import__( 'vimspector', fromlist = [ 'adapter_pool' ] )
+        \ .adapter_pool.Clear()
+endfunction
+
+function! vimspector#ClearShellCache() abort
+  " If python isn't loaded yet, there's nothing cached
+  if !s:Initialised()
+    return
+  endif
+
+  py3 __import__( 'vimspector', fromlist = [ 'utils' ] )
+        \ .utils.ClearShellVariableCache()
+endfunction
+
 function! vimspector#ShowEvalBalloon( is_visual ) abort
   if a:is_visual
     let expr = py3eval( '__import__( "vimspector", fromlist = [ "utils" ] )'
@@ -774,6 +807,22 @@ function! vimspector#PrintDebugInfo() abort
   py3 _vimspector_session.PrintDebugInfo()
 endfunction
 
+function! vimspector#PrintStats() abort
+  if !s:Enabled()
+    return
+  endif
+
+  py3 _vimspector_session.PrintStats()
+endfunction
+
+function! vimspector#GetStats() abort
+  if !s:Enabled()
+    return {}
+  endif
+
+  return py3eval( '_vimspector_session.GetStats()' )
+endfunction
+
 function! vimspector#ReadSessionFile( ... ) abort
   if !s:Enabled()
     return
@@ -89,6 +89,20 @@ function! vimspector#internal#channel#Send( msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#channel#Pump( timeout ) abort
+  " Wait up to timeout msec for data from the server, and handle it directly
+  " rather than waiting for the channel callback
+  if !exists( 's:ch' ) || ch_status( s:ch ) !=# 'open'
+    return 0
+  endif
+
+  let data = ch_readraw( s:ch, { 'timeout': a:timeout } )
+  if data !=# ''
+    call s:_OnServerData( s:ch, data )
+  endif
+  return 1
+endfunction
+
 function! vimspector#internal#channel#Timeout( id ) abort
   py3 << EOF
 _vimspector_session.OnRequestTimeout( vim.eval( 'a:id' ) )
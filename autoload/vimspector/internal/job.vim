@@ -128,6 +128,25 @@ function! vimspector#internal#job#Send( msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#job#Pump( timeout ) abort
+  " Wait up to timeout msec for data from the server, and handle it directly
+  " rather than waiting for the out_cb
+  if !exists( 's:job' ) || job_status( s:job ) !=# 'run'
+    return 0
+  endif
+
+  let ch = job_getchannel( s:job )
+  if ch_status( ch ) !=# 'open'
+    return 0
+  endif
+
+  let data = ch_readraw( ch, { 'timeout': a:timeout } )
+  if data !=# ''
+    call s:_OnServerData( ch, data )
+  endif
+  return 1
+endfunction
+
 function! vimspector#internal#job#StopDebugSession() abort
   if !exists( 's:job' )
     echom "Not stopping session: Job doesn't exist"
@@ -36,6 +36,7 @@ function! s:_OnEvent( chan_id, data, event ) abort
     unlet s:ch
     py3 _vimspector_session.OnServerExit( 0 )
   else
+    let s:received_data = v:true
     py3 _vimspector_session.OnChannelData( '\n'.join( vim.eval( 'a:data' ) ) )
   endif
 endfunction
@@ -99,6 +100,24 @@ function! vimspector#internal#neochannel#Send( msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#neochannel#Pump( timeout ) abort
+  " Wait up to timeout msec for data from the server. wait() returns as soon as
+  " the data has been handled.
+  if !exists( 's:ch' )
+    return 0
+  endif
+
+  if !exists( '*wait' )
+    " Older neovim: process events for a short time instead
+    sleep 1m
+    return 1
+  endif
+
+  let s:received_data = v:false
+  call wait( a:timeout, { -> s:received_data } )
+  return 1
+endfunction
+
 function! vimspector#internal#neochannel#StopDebugSession() abort
   if exists( 's:ch' )
     call chanclose( s:ch )
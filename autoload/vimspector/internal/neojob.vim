@@ -32,6 +32,7 @@ function! s:_OnEvent( chan_id, data, event ) abort
 
   " In neovim, the data argument is a list.
   if a:event ==# 'stdout'
+    let s:received_data = v:true
     py3 _vimspector_session.OnChannelData( '\n'.join( vim.eval( 'a:data' ) ) )
   elseif a:event ==# 'stderr'
     py3 _vimspector_session.OnServerStderr( '\n'.join( vim.eval( 'a:data' ) ) )
@@ -95,6 +96,24 @@ function! vimspector#internal#neojob#Send( msg ) abort
   return 1
 endfunction
 
+function! vimspector#internal#neojob#Pump( timeout ) abort
+  " Wait up to timeout msec for data from the server. wait() returns as soon as
+  " the data has been handled.
+  if !exists( 's:job' )
+    return 0
+  endif
+
+  if !exists( '*wait' )
+    " Older neovim: process events for a short time instead
+    sleep 1m
+    return 1
+  endif
+
+  let s:received_data = v:false
+  call wait( a:timeout, { -> s:received_data } )
+  return 1
+endfunction
+
 function! vimspector#internal#neojob#StopDebugSession() abort
   if !exists( 's:job' )
     return
@@ -0,0 +1,43 @@
+" vimspector - A multi-language debugging system for Vim
+" Copyright 2026 Ben Jackson
+"
+" Licensed under the Apache License, Version 2.0 (the "License");
+" you may not use this file except in compliance with the License.
+" You may obtain a copy of the License at
+"
+"   http://www.apache.org/licenses/LICENSE-2.0
+"
+" Unless required by applicable law or agreed to in writing, software
+" distributed under the License is distributed on an "AS IS" BASIS,
+" WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+" See the License for the specific language governing permissions and
+" limitations under the License.
+
+
+" Boilerplate {{{
+let s:save_cpo = &cpoptions
+set cpoptions&vim
+" }}}
+
+" The threaded transport (threaded_transport.py) does its I/O in Python. This
+" timer hands the messages it has received to the session (or the adapter pool)
+" on the main thread.
+function! vimspector#internal#thread#Drain( id ) abort
+  py3 << EOF
+__import__( 'vimspector', fromlist = [ 'threaded_transport' ] ) \
+  .threaded_transport.OnDrainTimer( int( vim.eval( 'a:id' ) ) )
+EOF
+endfunction
+
+" Stops the warm adapters (adapter_pool.py) which have been idle too long
+function! vimspector#internal#thread#ExpireWarmAdapters( id ) abort
+  py3 << EOF
+__import__( 'vimspector', fromlist = [ 'adapter_pool' ] ) \
+  .adapter_pool.Expire()
+EOF
+endfunction
+
+" Boilerplate {{{
+let &cpoptions=s:save_cpo
+unlet s:save_cpo
+" }}}
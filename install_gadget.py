@@ -23,7 +23,6 @@ if sys.version_info.major < 3:
 
 import argparse
 import os
-import json
 import functools
 import operator
 import glob
@@ -33,7 +32,7 @@ sys.path.insert( 1, os.path.join( os.path.dirname( __file__ ),
                                   'python3' ) )
 
 from vimspector import install, installer, gadgets
-from vimspector.vendor.json_minify import minify
+from vimspector import json_codec
 
 # ------------------------------------------------------------------------------
 # Entry point
@@ -175,7 +174,7 @@ for custom_file_name in functools.reduce( operator.add,
                                           args.custom_gadget_file,
                                           custom_files ):
   with open( custom_file_name, 'r' ) as custom_file:
-    CUSTOM_GADGETS.update( json.loads( minify( custom_file.read() ) ) )
+    CUSTOM_GADGETS.update( json_codec.LoadsWithComments( custom_file.read() ) )
 
 
 failed = []
@@ -160,6 +160,9 @@ command! -bar
 command! -bar
       \ VimspectorDebugInfo
       \ call vimspector#PrintDebugInfo()
+command! -bar
+      \ VimspectorStats
+      \ call vimspector#PrintStats()
 command! -nargs=1 -complete=custom,vimspector#CompleteExpr
       \ VimspectorEval
       \ call vimspector#Evaluate( <f-args> )
@@ -183,6 +186,9 @@ command! -bar -bang -nargs=*
 command! -bar -nargs=0
       \ VimspectorAbortInstall
       \ call vimspector#AbortInstall()
+command! -bar -nargs=0
+      \ VimspectorClearShellCache
+      \ call vimspector#ClearShellCache()
 
 " Session files
 command! -bar -nargs=? -complete=file
@@ -207,6 +213,9 @@ let g:vimspector_resetting = 0
 augroup Vimspector
   autocmd!
   autocmd BufNew * call vimspector#OnBufferCreated( expand( '<afile>' ) )
+  autocmd BufWritePost .vimspector*.json,.gadgets.json
+        \ call vimspector#OnConfigFileWritten()
+  autocmd VimLeavePre * call vimspector#OnVimLeave()
   autocmd TabClosed *
         \   if !g:vimspector_resetting
         \ |   call vimspector#internal#state#TabClosed( expand( '<afile>' ) )
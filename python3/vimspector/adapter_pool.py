@@ -0,0 +1,210 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# A pool of debug adapter processes which were started, and sent the initialize
+# request, ahead of time; so that starting or restarting a session with the
+# same adapter doesn't have to wait for that. Adapters opt in with
+# "warm_pool": true. Only adapters which talk over stdio are pooled (a second
+# instance of one with a port would fight over it), and the warm processes are
+# owned by a ThreadedTransport, which the session takes over.
+#
+# There is at most one warm adapter per adapter spec (the whole adapter dict,
+# with its variables expanded), and at most adapter_pool_size in all. Each is
+# stopped after it has been idle for adapter_pool_idle_timeout seconds, or when
+# the session is reset or Vim exits.
+
+import collections
+import json
+import logging
+import time
+import vim
+
+from vimspector import ( debug_adapter_connection,
+                         settings,
+                         threaded_transport,
+                         utils )
+
+_logger = logging.getLogger( __name__ )
+utils.SetUpLogging( _logger )
+
+# key -> WarmAdapter, oldest first
+_pool = collections.OrderedDict()
+_expiry_timer = None
+
+
+class WarmAdapter( object ):
+  """A started adapter, and everything it has sent, until a session takes
+  over with Adopt."""
+  def __init__( self, key, adapter, initialize_request ):
+    self.key = key
+    self.started = time.monotonic()
+    self._adapter = adapter
+    self.initialize_request = dict( initialize_request,
+                                    seq = 0,
+                                    type = 'request' )
+    # Callbacks given to Adopt: on_message, on_stderr, on_exit and
+    # on_initialize_response
+    self._target = None
+    # ( index into _target, args ) received before Adopt
+    self._buffered = []
+    self.transport = threaded_transport.ThreadedTransport( self._OnMessage,
+                                                           self._OnStderr,
+                                                           self._OnExit )
+
+
+  def Start( self ):
+    if not self.transport.Start( self._adapter ):
+      return False
+
+    return self.transport.Send(
+      debug_adapter_connection.FrameMessage( self.initialize_request ) )
+
+
+  def Adopt( self,
+             on_message,
+             on_stderr,
+             on_exit,
+             on_initialize_response ):
+    """Hand everything from the adapter to these callbacks, starting with what
+    it has sent so far. The initialize response goes to on_initialize_response
+    rather than on_message. The next request sent must have seq 1."""
+    self._target = ( on_message, on_stderr, on_exit, on_initialize_response )
+    buffered, self._buffered = self._buffered, []
+    for index, args in buffered:
+      self._target[ index ]( *args )
+
+
+  def Stop( self ):
+    self.transport.Stop()
+
+
+  def _OnMessage( self, message, size ):
+    if ( message.get( 'type' ) == 'response' and
+         message.get( 'request_seq' ) == 0 ):
+      self._Dispatch( 3, message )
+    else:
+      self._Dispatch( 0, message, size )
+
+
+  def _OnStderr( self, text ):
+    self._Dispatch( 1, text )
+
+
+  def _OnExit( self, status ):
+    if self._target is None:
+      _logger.info( 'Warm adapter exited with status %s', status )
+      Discard( self )
+    self._Dispatch( 2, status )
+
+
+  def _Dispatch( self, index, *args ):
+    if self._target is None:
+      self._buffered.append( ( index, args ) )
+    else:
+      self._target[ index ]( *args )
+
+
+def Key( adapter ):
+  return json.dumps( adapter, sort_keys = True )
+
+
+def IsPoolable( adapter ):
+  return ( bool( adapter.get( 'warm_pool' ) ) and
+           'command' in adapter and
+           'port' not in adapter and
+           not adapter.get( 'tty' ) )
+
+
+def Take( adapter ):
+  """Return the WarmAdapter for adapter (which the caller now owns), or None if
+  there isn't one."""
+  Expire()
+  warm = _pool.pop( Key( adapter ), None )
+  if warm is not None:
+    _logger.info( 'Using warm adapter started %.1fs ago',
+                  time.monotonic() - warm.started )
+  _ScheduleExpiry()
+  return warm
+
+
+def Warm( adapter, initialize_request ):
+  """Start an adapter like adapter, ready for the next Take, unless there's
+  already one."""
+  size = settings.Int( 'adapter_pool_size' )
+  key = Key( adapter )
+  if size <= 0 or key in _pool or not IsPoolable( adapter ):
+    return
+
+  while len( _pool ) >= size:
+    _, oldest = _pool.popitem( last = False )
+    oldest.Stop()
+
+  warm = WarmAdapter( key, adapter, initialize_request )
+  _logger.info( 'Starting warm adapter: %s', key )
+  if not warm.Start():
+    warm.Stop()
+    return
+
+  _pool[ key ] = warm
+  _ScheduleExpiry()
+
+
+def Discard( warm ):
+  if _pool.get( warm.key ) is warm:
+    del _pool[ warm.key ]
+    _ScheduleExpiry()
+
+
+def Expire():
+  """Stop the warm adapters which have been idle too long"""
+  deadline = time.monotonic() - settings.Int( 'adapter_pool_idle_timeout' )
+  while _pool:
+    warm = next( iter( _pool.values() ) )
+    if warm.started > deadline:
+      break
+    _logger.info( 'Stopping idle warm adapter: %s', warm.key )
+    del _pool[ warm.key ]
+    warm.Stop()
+
+  _ScheduleExpiry()
+
+
+def Clear():
+  while _pool:
+    _, warm = _pool.popitem( last = False )
+    warm.Stop()
+  _ScheduleExpiry()
+
+
+def Size():
+  return len( _pool )
+
+
+def _ScheduleExpiry():
+  global _expiry_timer
+  if _expiry_timer is not None:
+    vim.eval( f'timer_stop( { _expiry_timer } )' )
+    _expiry_timer = None
+
+  if not _pool:
+    return
+
+  oldest = next( iter( _pool.values() ) )
+  delay = ( oldest.started +
+            settings.Int( 'adapter_pool_idle_timeout' ) -
+            time.monotonic() )
+  _expiry_timer = int( vim.eval(
+    'timer_start( {}, "vimspector#internal#thread#ExpireWarmAdapters" )'
+    .format( max( 0, int( delay * 1000 ) ) ) ) )
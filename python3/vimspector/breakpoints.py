@@ -19,9 +19,13 @@ import vim
 import os
 import logging
 import operator
+import typing
 
 import json
-from vimspector import utils, signs, settings, disassembly
+from vimspector import utils, signs, settings
+
+if typing.TYPE_CHECKING:
+  from vimspector import disassembly
 
 
 def _JumpToBreakpoint( qfbp ):
@@ -177,7 +181,7 @@ class ProjectBreakpoints( object ):
   def __init__( self,
                 render_event_emitter,
                 IsPCPresentAt,
-                disassembly_manager: disassembly.DisassemblyView ):
+                disassembly_manager: 'disassembly.DisassemblyView' ):
     self._connection = None
     self._logger = logging.getLogger( __name__ )
     self._render_subject = render_event_emitter.subscribe( self.Refresh )
@@ -719,14 +723,27 @@ class ProjectBreakpoints( object ):
 
     self._awaiting_bp_responses = 0
 
-    def response_received( *failure_args ):
+    # All of the requests are sent together, and we process the responses once
+    # they have all arrived. on_success[ i ] handles the response to
+    # requests[ i ].
+    requests = []
+    on_success = []
+
+    def response_handler( msg, bp_idxs = [] ):
+      server_bps = ( msg.get( 'body' ) or {} ).get( 'breakpoints' ) or []
+      self._UpdateServerBreakpoints( server_bps, bp_idxs )
+
+    def responses_received( results ):
       self._awaiting_bp_responses -= 1
 
-      if failure_args and self._connection:
-        reason, msg = failure_args
-        utils.UserMessage( 'Unable to set breakpoint: {0}'.format( reason ),
-                           persist = True,
-                           error = True )
+      for ( reason, msg ), handler in zip( results, on_success ):
+        if reason is None:
+          if handler:
+            handler( msg )
+        elif self._connection:
+          utils.UserMessage( 'Unable to set breakpoint: {0}'.format( reason ),
+                             persist = True,
+                             error = True )
 
       if self._awaiting_bp_responses > 0:
         return
@@ -739,14 +756,6 @@ class ProjectBreakpoints( object ):
         self._pending_send_breakpoints = None
         self.SendBreakpoints( *args )
 
-
-    def response_handler( msg, bp_idxs = [] ):
-      server_bps = ( msg.get( 'body' ) or {} ).get( 'breakpoints' ) or []
-      self._UpdateServerBreakpoints( server_bps, bp_idxs )
-      response_received()
-
-    # NOTE: Must do this _first_ otherwise we might send requests and get
-    # replies before we finished sending all the requests.
     if self._exception_breakpoints is None:
       self._SetUpExceptionBreakpoints( self._configured_breakpoints )
 
@@ -785,27 +794,23 @@ class ProjectBreakpoints( object ):
         'path': file_name,
       }
 
-      self._awaiting_bp_responses += 1
-      self._connection.DoRequest(
-        # The source=source here is critical to ensure that we capture each
-        # source in the iteration, rather than ending up passing the same source
-        # to each callback.
-        lambda msg, bp_idxs=bp_idxs: response_handler( msg, bp_idxs ),
-        {
-          'command': 'setBreakpoints',
-          'arguments': {
-            'source': source,
-            'breakpoints': breakpoints,
-            'sourceModified': False, # TODO: We can actually check this
-          },
+      # The bp_idxs=bp_idxs here is critical to ensure that we capture each
+      # set of indices in the iteration, rather than ending up passing the same
+      # indices to each callback.
+      on_success.append(
+        lambda msg, bp_idxs=bp_idxs: response_handler( msg, bp_idxs ) )
+      requests.append( {
+        'command': 'setBreakpoints',
+        'arguments': {
+          'source': source,
+          'breakpoints': breakpoints,
+          'sourceModified': False, # TODO: We can actually check this
         },
-        failure_handler = response_received
-      )
+      } )
 
     # TODO: Add the _configured_breakpoints to function breakpoints
 
     if self._server_capabilities.get( 'supportsFunctionBreakpoints' ):
-      self._awaiting_bp_responses += 1
       breakpoints = []
       for bp in self._func_breakpoints:
         bp.pop( 'server_bp', None )
@@ -825,16 +830,13 @@ class ProjectBreakpoints( object ):
       #  - make sure that ConnectionClosed also cleares the server_bp data for
       #    function breakpionts
       #  - make sure that we have tests for this, because i'm sure we don't!
-      self._connection.DoRequest(
-        lambda msg: response_handler( msg ),
-        {
-          'command': 'setFunctionBreakpoints',
-          'arguments': {
-            'breakpoints': breakpoints,
-          }
-        },
-        failure_handler = response_received
-      )
+      on_success.append( response_handler )
+      requests.append( {
+        'command': 'setFunctionBreakpoints',
+        'arguments': {
+          'breakpoints': breakpoints,
+        }
+      } )
 
     if self._disassembly_manager:
       breakpoints = []
@@ -870,31 +872,29 @@ class ProjectBreakpoints( object ):
 
           breakpoints.append( dap_bp )
 
-      self._awaiting_bp_responses += 1
-      self._connection.DoRequest(
-        lambda msg, bp_idxs=bp_idxs: response_handler( msg, bp_idxs ),
-        {
-          'command': 'setInstructionBreakpoints',
-          'arguments': {
-            'breakpoints': breakpoints,
-          },
+      on_success.append(
+        lambda msg, bp_idxs=bp_idxs: response_handler( msg, bp_idxs ) )
+      requests.append( {
+        'command': 'setInstructionBreakpoints',
+        'arguments': {
+          'breakpoints': breakpoints,
         },
-        failure_handler = response_received
-      )
+      } )
 
     if self._exception_breakpoints:
-      self._awaiting_bp_responses += 1
-      self._connection.DoRequest(
-        lambda msg: response_received(),
-        {
-          'command': 'setExceptionBreakpoints',
-          'arguments': self._exception_breakpoints
-        },
-        failure_handler = response_received
-      )
+      on_success.append( None )
+      requests.append( {
+        'command': 'setExceptionBreakpoints',
+        'arguments': self._exception_breakpoints
+      } )
+
+    if not requests:
+      if doneHandler:
+        doneHandler()
+      return
 
-    if self._awaiting_bp_responses == 0 and doneHandler:
-      doneHandler()
+    self._awaiting_bp_responses += 1
+    self._connection.DoRequests( responses_received, requests )
 
 
   def _SetUpExceptionBreakpoints( self, configured_breakpoints ):
@@ -0,0 +1,188 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# A process-wide cache of the parsed configuration (.vimspector.json, gadget
+# config, etc.) files. A file is only read and parsed again if its mtime or size
+# has changed. The merged adapters and configurations from a list of files are
+# cached too, along with an index of the configurations by filetype and their
+# resolved 'extends' chains.
+
+import collections
+import copy
+import logging
+import os
+
+from vimspector import core_utils, json_codec, utils
+
+_logger = logging.getLogger( __name__ )
+utils.SetUpLogging( _logger )
+
+# path -> ( ( mtime, size ), database )
+_files = {}
+
+# tuple of paths -> ( tuple of ( mtime, size ), base, ConfigDatabase )
+_merged = {}
+
+
+class ConfigDatabase( object ):
+  """The adapters and configurations merged from some config files. This is
+  shared by everyone who loads the same files, so the dicts must not be
+  modified; ResolveConfiguration returns a copy which can be."""
+  def __init__( self, adapters, configurations ):
+    self.adapters = adapters
+    self.configurations = configurations
+
+    self._position = { name: i for i, name in enumerate( configurations ) }
+    # Configurations without 'filetypes', which are for any filetype
+    self._any_filetype = []
+    # filetype -> names of the configurations with it in their 'filetypes'
+    self._by_filetype = collections.defaultdict( list )
+    # Configurations with a 'filetypes' which isn't a list, which are matched
+    # the slow way
+    self._unindexed = []
+    for name, configuration in configurations.items():
+      if 'filetypes' not in configuration:
+        self._any_filetype.append( name )
+      elif isinstance( configuration[ 'filetypes' ], list ):
+        for filetype in set( configuration[ 'filetypes' ] ):
+          self._by_filetype[ filetype ].append( name )
+      else:
+        self._unindexed.append( name )
+
+    # tuple of filetypes -> list of configuration names
+    self._names = {}
+    # name -> configuration, with everything it extends applied
+    self._resolved = {}
+
+
+  def ConfigurationNames( self, filetypes ):
+    """Return the names of the configurations for any of filetypes (i.e. those
+    which don't have a 'filetypes' list, or it includes one of them), in the
+    order they were defined. If filetypes is empty, that's all of them."""
+    if not filetypes:
+      return list( self.configurations )
+
+    key = tuple( filetypes )
+    names = self._names.get( key )
+    if names is None:
+      names = set( self._any_filetype )
+      for filetype in filetypes:
+        names.update( self._by_filetype.get( filetype, () ) )
+      names.update( name for name in self._unindexed if any(
+        ft in self.configurations[ name ][ 'filetypes' ] for ft in filetypes ) )
+
+      names = sorted( names, key = self._position.__getitem__ )
+      self._names[ key ] = names
+
+    return list( names )
+
+
+  def ResolveConfiguration( self, name ):
+    """Return a copy of the named configuration, with the configurations that
+    it extends applied. Raises KeyError if there's no such configuration, or
+    RuntimeError if one it extends doesn't exist."""
+    resolved = self._resolved.get( name )
+    if resolved is None:
+      resolved = self._Resolve( name )
+      self._resolved[ name ] = resolved
+
+    return copy.deepcopy( resolved )
+
+
+  def _Resolve( self, name ):
+    configuration = copy.deepcopy( self.configurations[ name ] )
+
+    # Each configuration in the chain is applied to a copy of its base. Reuse
+    # the copies, so that a loop terminates.
+    copies = { name: configuration }
+    current_configuration_name = name
+    while 'extends' in configuration:
+      base_configuration_name = configuration.pop( 'extends' )
+      base_configuration = copies.get( base_configuration_name )
+      if base_configuration is None:
+        base_configuration = copy.deepcopy(
+          self.configurations.get( base_configuration_name ) )
+      if base_configuration is None:
+        raise RuntimeError( f"The adapter { current_configuration_name } "
+                            f"extends configuration { base_configuration_name }"
+                            ", but this does not exist" )
+
+      copies[ base_configuration_name ] = base_configuration
+      core_utils.override( base_configuration, configuration )
+      current_configuration_name = base_configuration_name
+      configuration = base_configuration
+
+    return configuration
+
+
+def _Signature( path ):
+  if not path:
+    return None
+
+  try:
+    stat = os.stat( path )
+  except OSError:
+    return None
+
+  return ( stat.st_mtime_ns, stat.st_size )
+
+
+def _Read( path, signature ):
+  cached = _files.get( path )
+  if cached is not None and cached[ 0 ] == signature:
+    return cached[ 1 ]
+
+  _logger.debug( 'Parsing config file: %s', path )
+  with open( path, 'r' ) as f:
+    database = json_codec.LoadsWithComments( f.read() )
+
+  _files[ path ] = ( signature, database )
+  return database
+
+
+def LoadDatabase( paths, base_configurations = None ):
+  """Read the config files in paths (skipping any which don't exist) and return
+  a ConfigDatabase of the 'adapters' and 'configurations' from them, on top of
+  base_configurations. Where files define the same name, the later one wins."""
+  paths = tuple( paths )
+  signatures = tuple( _Signature( path ) for path in paths )
+  base_configurations = base_configurations or {}
+
+  cached = _merged.get( paths )
+  if ( cached is None or
+       cached[ 0 ] != signatures or
+       cached[ 1 ] != base_configurations ):
+    base_configurations = copy.deepcopy( base_configurations )
+    adapters = {}
+    configurations = dict( base_configurations )
+    for path, signature in zip( paths, signatures ):
+      if signature is None:
+        continue
+
+      database = _Read( path, signature )
+      adapters.update( database.get( 'adapters' ) or {} )
+      configurations.update( database.get( 'configurations' ) or {} )
+
+    cached = ( signatures,
+               base_configurations,
+               ConfigDatabase( adapters, configurations ) )
+    _merged[ paths ] = cached
+
+  return cached[ 2 ]
+
+
+def Clear():
+  _files.clear()
+  _merged.clear()
@@ -13,30 +13,112 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import functools
+import threading
+import time
 import typing
 from collections.abc import Mapping
 
+# func -> MemoCache, for every memoized function
 MEMO = {}
 
 
-def memoize( func ):
-  global MEMO
+class MemoCache( object ):
+  """The results of a memoized function, keyed on its arguments. If maxsize is
+  set, the least recently used result is dropped to make room for a new one. If
+  ttl is set, results are only used for that many seconds."""
+  def __init__( self, func, maxsize = None, ttl = None ):
+    self.func = func
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    # key -> ( expiry or None, result ), least recently used first
+    self._results = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+
+  def Call( self, args, kwargs ):
+    key = ( args, frozenset( kwargs.items() ) )
+    with self._lock:
+      cached = self._results.get( key )
+      if cached is not None and ( cached[ 0 ] is None or
+                                  cached[ 0 ] > time.monotonic() ):
+        self.hits += 1
+        if self.maxsize is not None:
+          self._results.move_to_end( key )
+        return cached[ 1 ]
+      self.misses += 1
+
+    # Not under the lock, as func might call memoized functions (or this one)
+    result = self.func( *args, **kwargs )
+    expiry = None if self.ttl is None else time.monotonic() + self.ttl
+
+    with self._lock:
+      self._results[ key ] = ( expiry, result )
+      self._results.move_to_end( key )
+      if self.maxsize is not None:
+        while len( self._results ) > self.maxsize:
+          self._results.popitem( last = False )
+          self.evictions += 1
+
+    return result
+
+
+  def Invalidate( self, args, kwargs ):
+    with self._lock:
+      self._results.pop( ( args, frozenset( kwargs.items() ) ), None )
+
+
+  def Clear( self ):
+    with self._lock:
+      self._results.clear()
+
+
+  def Info( self ):
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'evictions': self.evictions,
+        'size': len( self._results ),
+        'maxsize': self.maxsize,
+        'ttl': self.ttl,
+      }
+
+
+def memoize( func = None, *, maxsize = None, ttl = None ):
+  """Cache the results of func for each set of arguments, which must be
+  hashable. Use as @memoize, or @memoize( maxsize = N, ttl = seconds ) to bound
+  the cache. The wrapper has:
+    - cache_info(), which returns the hits, misses, evictions and size
+    - cache_clear(), which forgets all of the results
+    - cache_invalidate( *args, **kwargs ), which forgets one of them"""
+  if func is None:
+    return functools.partial( memoize, maxsize = maxsize, ttl = ttl )
+
+  cache = MemoCache( func, maxsize, ttl )
+  MEMO[ func ] = cache
 
   @functools.wraps( func )
   def wrapper( *args, **kwargs ):
-    dct = MEMO.setdefault( func, {} )
-    key = ( args, frozenset( kwargs.items() ) )
-    try:
-      return dct[ key ]
-    except KeyError:
-      result = func( *args, **kwargs )
-      dct[ key ] = result
-      return result
+    return cache.Call( args, kwargs )
 
+  wrapper.cache_info = cache.Info
+  wrapper.cache_clear = cache.Clear
+  wrapper.cache_invalidate = lambda *args, **kwargs: cache.Invalidate( args,
+                                                                        kwargs )
   return wrapper
 
 
+def MemoizeStats():
+  """Return the cache_info() of each memoized function, by name"""
+  return { f'{ func.__module__ }.{ func.__qualname__ }': cache.Info()
+           for func, cache in MEMO.items() }
+
+
 def override( target_dict: typing.MutableMapping,
               override_dict: typing.Mapping ):
   """Apply the updates in override_dict to the dict target_dict. This is like
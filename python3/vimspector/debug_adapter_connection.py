@@ -13,22 +13,333 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
+import functools
+import heapq
 import logging
 import json
+import time
 import vim
 
-from vimspector import utils
+from vimspector import json_codec, utils
 
 DEFAULT_SYNC_TIMEOUT = 5000
 DEFAULT_ASYNC_TIMEOUT = 15000
 
+# How often (in ms) the request timeout timer fires while there are requests
+# outstanding. This is the resolution of the request timeouts.
+TIMEOUT_TICK = 100
+
+# Requests which have no side effects, so an identical request which is already
+# in flight can be answered with the same response rather than sent again
+COALESCABLE_COMMANDS = frozenset( [
+  'scopes',
+  'source',
+  'stackTrace',
+  'threads',
+  'variables',
+] )
+
+# Priority classes for requests, most urgent first. When the number of requests
+# in flight is limited (see max_in_flight), the queued requests are sent in this
+# order.
+PRIORITY_USER = 0        # What the user is waiting for, e.g. step and continue
+PRIORITY_VIEW = 1        # Data for the views
+PRIORITY_BACKGROUND = 2  # Anything which isn't needed right now
+PRIORITIES = ( PRIORITY_USER, PRIORITY_VIEW, PRIORITY_BACKGROUND )
+
+# Requests which are PRIORITY_USER unless the caller says otherwise. Everything
+# else is PRIORITY_VIEW.
+USER_COMMANDS = frozenset( [
+  'cancel',
+  'continue',
+  'disconnect',
+  'goto',
+  'next',
+  'pause',
+  'restart',
+  'restartFrame',
+  'reverseContinue',
+  'stepBack',
+  'stepIn',
+  'stepOut',
+  'terminate',
+] )
+
+# The number of most recent latencies per command that the percentiles are
+# calculated from
+STATS_SAMPLE_SIZE = 1000
+
 
 class PendingRequest( object ):
-  def __init__( self, msg, handler, failure_handler, expiry_id ):
+  def __init__( self, msg, handler, failure_handler, timeout, priority ):
     self.msg = msg
     self.handler = handler
     self.failure_handler = failure_handler
-    self.expiry_id = expiry_id
+    self.timeout = timeout
+    self.priority = priority
+    # Set when the request is actually sent, which may be some time after it
+    # was made if too many requests are in flight
+    self.sent = None
+    self.expiry = None
+    self.size = 0
+    self.queued = False
+    # For coalescable requests, the key in the connection's _in_flight. When
+    # this is an identical copy of an in-flight request, primary is the request
+    # it's waiting for, otherwise waiters are the copies waiting for this one
+    self.key = None
+    self.primary = None
+    self.waiters = []
+    # For requests made with discard_if_stale, the connection's generation
+    # when it was made. Once the debuggee resumes, the request is stale and
+    # its response is discarded.
+    self.generation = None
+    self.stale = False
+    # For requests made with DoRequests, records a failure in the batch. It's
+    # called before the failure_handler.
+    self.batch_failure = None
+
+
+class CommandStats( object ):
+  def __init__( self ):
+    self.count = 0
+    self.failed = 0
+    self.aborted = 0
+    self.coalesced = 0
+    self.discarded = 0
+    self.latencies = collections.deque( maxlen = STATS_SAMPLE_SIZE )
+    self.request_bytes = 0
+    self.response_bytes = 0
+    self.max_response_bytes = 0
+
+
+class RequestStats( object ):
+  """Per-command counts, latencies and payload sizes of the requests sent to
+  the debug adapter."""
+  def __init__( self ):
+    self._commands = collections.defaultdict( CommandStats )
+
+  def RecordResponse( self, request, success, latency, size ):
+    stats = self._commands[ request.msg[ 'command' ] ]
+    stats.count += 1
+    if not success:
+      stats.failed += 1
+    stats.latencies.append( latency )
+    stats.request_bytes += request.size
+    stats.response_bytes += size
+    stats.max_response_bytes = max( stats.max_response_bytes, size )
+
+  def RecordCoalesced( self, request ):
+    self._commands[ request.msg[ 'command' ] ].coalesced += 1
+
+  def RecordDiscarded( self, request ):
+    self._commands[ request.msg[ 'command' ] ].discarded += 1
+
+  def RecordAbort( self, request ):
+    stats = self._commands[ request.msg[ 'command' ] ]
+    stats.aborted += 1
+    stats.request_bytes += request.size
+
+  def Get( self ):
+    """Return a dict of command -> summary, with latencies in ms and sizes in
+    bytes."""
+    def Percentile( ordered, p ):
+      if not ordered:
+        return None
+      # Nearest rank
+      index = max( 0, -( -len( ordered ) * p // 100 ) - 1 )
+      return round( ordered[ int( index ) ] * 1000, 1 )
+
+    summary = {}
+    for command, stats in self._commands.items():
+      ordered = sorted( stats.latencies )
+      sent = stats.count + stats.aborted
+      summary[ command ] = {
+        'count': stats.count,
+        'failed': stats.failed,
+        'aborted': stats.aborted,
+        'coalesced': stats.coalesced,
+        'discarded': stats.discarded,
+        'p50': Percentile( ordered, 50 ),
+        'p95': Percentile( ordered, 95 ),
+        'p99': Percentile( ordered, 99 ),
+        'max': Percentile( ordered, 100 ),
+        'mean_request_bytes': stats.request_bytes // sent if sent else 0,
+        'mean_response_bytes': ( stats.response_bytes // stats.count
+                                 if stats.count else 0 ),
+        'max_response_bytes': stats.max_response_bytes,
+      }
+
+    return summary
+
+
+class PendingBatch( object ):
+  """A group of requests sent together with DoRequests. The handler is called
+  once, when all of them have completed."""
+  def __init__( self, handler, count ):
+    self.handler = handler
+    self.results = [ None ] * count
+    self.remaining = count
+
+  def Complete( self, index, reason, message ):
+    self.results[ index ] = ( reason, message )
+    self.remaining -= 1
+    if self.remaining == 0:
+      self.handler( self.results )
+
+
+def _IgnoreFailure( reason, message ):
+  # The failure is reported to the batch's handler
+  pass
+
+
+class MessageFramer( object ):
+  """Splits the data received from the debug adapter into messages and decodes
+  them, calling on_message( message, size ) for each one."""
+  def __init__( self, on_message ):
+    self._logger = logging.getLogger( __name__ )
+    utils.SetUpLogging( self._logger )
+
+    self._on_message = on_message
+    self._SetState( 'READ_HEADER' )
+    # Received data is appended to _buffer and consumed from _buffer_pos. The
+    # consumed prefix is only discarded once it dominates the buffer, so each
+    # received byte is copied a bounded number of times, regardless of how many
+    # chunks a message arrives in.
+    self._buffer = bytearray()
+    self._buffer_pos = 0
+    # How far we've already searched for the end of the headers, so that
+    # we don't rescan the same bytes every time a chunk arrives.
+    self._header_scan_pos = 0
+
+  def OnData( self, data: bytes ):
+    self._buffer += data
+
+    while True:
+      if self._state == 'READ_HEADER':
+        self._ReadHeaders()
+
+      if self._state == 'READ_BODY':
+        self._ReadBody()
+      else:
+        break
+
+      if self._state != 'READ_HEADER':
+        # We ran out of data whilst reading the body. Await more data.
+        break
+
+    self._CompactBuffer()
+
+  def _CompactBuffer( self ):
+    if self._buffer_pos == 0:
+      return
+
+    if self._buffer_pos >= len( self._buffer ):
+      # Everything was consumed, which is by far the most common case
+      self._buffer.clear()
+      self._header_scan_pos = 0
+      self._buffer_pos = 0
+    elif self._buffer_pos * 2 >= len( self._buffer ):
+      # Only move the unconsumed tail when it's smaller than what we discard
+      del self._buffer[ : self._buffer_pos ]
+      self._header_scan_pos = max( 0,
+                                   self._header_scan_pos - self._buffer_pos )
+      self._buffer_pos = 0
+
+  def _SetState( self, state ):
+    self._state = state
+    if state == 'READ_HEADER':
+      self._headers = {}
+
+  def _ReadHeaders( self ):
+    # Resume searching where we stopped last time, backing up in case the
+    # separator was split across chunks.
+    start = max( self._buffer_pos, self._header_scan_pos - 3 )
+    end = self._buffer.find( b'\r\n\r\n', start )
+
+    if end < 0:
+      # otherwise waiting for more data
+      self._header_scan_pos = len( self._buffer )
+      return
+
+    line_start = self._buffer_pos
+    while line_start < end:
+      line_end = self._buffer.find( b'\r\n', line_start, end )
+      if line_end < 0:
+        line_end = end
+      self._ReadHeaderLine( line_start, line_end )
+      line_start = line_end + 2
+
+    # Chomp (+4 for the 2 newlines which were the separator)
+    self._buffer_pos = end + 4
+    self._header_scan_pos = self._buffer_pos
+    self._SetState( 'READ_BODY' )
+
+  def _ReadHeaderLine( self, start, end ):
+    # Work around bugs in cppdbg where mono spams nonesense to stdout.
+    # This is such a dodgyhack, but it fixes the issues.
+    newline = self._buffer.rfind( b'\n', start, end )
+    if newline >= 0:
+      start = newline + 1
+
+    colon = self._buffer.find( b':', start, end )
+    if colon < 0:
+      if self._buffer[ start : end ].strip():
+        self._logger.warning( 'Ignoring invalid header line: %s',
+                              self._buffer[ start : end ] )
+      return
+
+    key = self._buffer[ start : colon ].decode( 'utf-8' )
+    self._headers[ key ] = self._buffer[ colon + 1 : end ].decode( 'utf-8' )
+
+  def _ReadBody( self ):
+    try:
+      content_length = int( self._headers[ 'Content-Length' ] )
+    except KeyError:
+      # Ug oh. We seem to have all the headers, but no Content-Length
+      # Skip to reading headers. Because, what else can we do.
+      self._logger.error( 'Missing Content-Length header in: {0}'.format(
+        json.dumps( self._headers ) ) )
+
+      self._buffer_pos = len( self._buffer )
+      self._SetState( 'READ_HEADER' )
+      return
+
+    body_start = self._buffer_pos
+    body_end = body_start + content_length
+    if len( self._buffer ) < body_end:
+      # Need more data
+      assert self._state == 'READ_BODY'
+      return
+
+    # Decode straight out of the buffer; the memoryview must be released before
+    # the buffer is next resized.
+    self._buffer_pos = body_end
+    self._SetState( 'READ_HEADER' )
+    with memoryview( self._buffer ) as view:
+      payload = view[ body_start : body_end ]
+      try:
+        message = json_codec.Loads( payload )
+      except Exception:
+        # Skip it, but carry on with any messages after it
+        self._logger.exception( "Invalid message received: %s",
+                                bytes( payload ) )
+        return
+      finally:
+        payload.release()
+
+    self._logger.debug( 'Message received: %s', message )
+    self._on_message( message, content_length )
+
+
+def FrameMessage( msg ):
+  """Encode msg as a DAP message, with its Content-Length header"""
+  msg = json_codec.Dumps( msg )
+
+  # Content-Length is in bytes, and the message isn't necessarily ASCII
+  return 'Content-Length: {0}\r\n\r\n{1}'.format(
+    len( msg.encode( 'utf-8' ) ),
+    msg )
 
 
 class DebugAdapterConnection( object ):
@@ -36,7 +347,12 @@ class DebugAdapterConnection( object ):
                 handlers,
                 send_func,
                 sync_timeout = None,
-                async_timeout = None ):
+                async_timeout = None,
+                pump_func = None,
+                stats = None,
+                max_in_flight = None,
+                recorder = None,
+                first_seq = 0 ):
     self._logger = logging.getLogger( __name__ )
     utils.SetUpLogging( self._logger )
 
@@ -46,42 +362,196 @@ class DebugAdapterConnection( object ):
       async_timeout = DEFAULT_ASYNC_TIMEOUT
 
     self._Write = send_func
-    self._SetState( 'READ_HEADER' )
-    self._buffer = bytes()
+    self._Pump = pump_func
+    self._framer = MessageFramer( self._OnMessageReceived )
     self._handlers = handlers
-    self._next_message_id = 0
+    self._BuildDispatchTable( handlers )
+    # Not 0 if some messages were sent before we took over (see adapter_pool)
+    self._next_message_id = first_seq
+    # seq -> PendingRequest for the requests which have been sent
     self._outstanding_requests = {}
+    # The requests waiting to be sent, one queue per priority
+    self._queued_requests = { p: collections.deque() for p in PRIORITIES }
+    # The maximum number of requests in flight at once, or 0 for no limit
+    self.max_in_flight = max_in_flight or 0
+    # ( command, arguments ) -> PendingRequest for coalescable requests
+    self._in_flight = {}
+    # Heap of ( expiry, seq ) for the outstanding requests. Entries for requests
+    # which have already completed are discarded when they reach the top.
+    self._request_deadlines = []
+    self._timeout_timer = None
+    # While set, requests don't time out (see PauseTimeouts); it's when they
+    # were paused
+    self._timeouts_paused_at = None
     self.async_timeout = async_timeout
     self.sync_timeout = sync_timeout
+    self.stats = stats if stats is not None else RequestStats()
+    # A SessionRecorder, if the messages are being recorded
+    self._recorder = recorder
+    # Incremented each time the debuggee stops or resumes (see NewGeneration)
+    self._generation = 0
+    # Set when the adapter reports supportsCancelRequest
+    self.supports_cancel = False
 
   def DoRequest( self,
                  handler,
                  msg,
                  failure_handler=None,
-                 timeout = None ):
+                 timeout = None,
+                 discard_if_stale = False,
+                 priority = None ):
+    """Send the request in msg. If discard_if_stale is set, the request is
+    only relevant until the next NewGeneration (e.g. it relates to the current
+    frame); after that its response is dropped and no handler is called.
+    priority is one of the PRIORITY_ constants, and defaults based on the
+    command."""
+    request = self._AddRequest( handler,
+                                msg,
+                                failure_handler,
+                                timeout,
+                                discard_if_stale,
+                                priority )
+    self._SendRequests( [ request ] )
+
+
+  def DoRequests( self,
+                  handler,
+                  msgs,
+                  failure_handlers = None,
+                  timeout = None,
+                  discard_if_stale = False,
+                  priority = None ):
+    """Send all of the requests in msgs with a single write and call
+    handler( results ) once they have all completed. results is a list in the
+    same order as msgs of ( reason, message ) tuples, where reason is None if
+    the request succeeded, or the reason it failed otherwise.
+
+    If failure_handlers is supplied, it is a list in the same order as msgs,
+    and each request's failure is also passed to its entry, as for
+    DoRequest's failure_handler (so None gets the default failure handling).
+    Otherwise, failures are only reported to handler. discard_if_stale and
+    priority are as for DoRequest; the handler is not called if the batch goes
+    stale."""
+    if not msgs:
+      handler( [] )
+      return
 
+    batch = PendingBatch( handler, len( msgs ) )
+    requests = []
+    for index, msg in enumerate( msgs ):
+      complete = functools.partial( batch.Complete, index )
+      if failure_handlers is None:
+        failure_handler = _IgnoreFailure
+      else:
+        failure_handler = failure_handlers[ index ]
+
+      request = self._AddRequest( functools.partial( complete, None ),
+                                  msg,
+                                  failure_handler,
+                                  timeout,
+                                  discard_if_stale,
+                                  priority )
+      request.batch_failure = complete
+      requests.append( request )
+
+    self._SendRequests( requests )
+
+
+  def _AddRequest( self,
+                   handler,
+                   msg,
+                   failure_handler,
+                   timeout,
+                   discard_if_stale = False,
+                   priority = None ):
     if timeout is None:
       timeout = self.async_timeout
 
-    this_id = self._next_message_id
-    self._next_message_id += 1
-
-    msg[ 'seq' ] = this_id
-    msg[ 'type' ] = 'request'
-
-    # TODO/FIXME: This is so messy
-    expiry_id = vim.eval(
-      'timer_start( {}, "vimspector#internal#channel#Timeout" )'.format(
-        timeout ) )
+    if priority is None:
+      priority = ( PRIORITY_USER if msg.get( 'command' ) in USER_COMMANDS
+                   else PRIORITY_VIEW )
 
     request = PendingRequest( msg,
                               handler,
                               failure_handler,
-                              expiry_id )
-    self._outstanding_requests[ this_id ] = request
-
-    if not self._SendMessage( msg ):
-      self._AbortRequest( request, 'Unable to send message' )
+                              timeout,
+                              priority )
+    if discard_if_stale:
+      request.generation = self._generation
+
+    if msg.get( 'command' ) in COALESCABLE_COMMANDS:
+      # Only share responses between requests which go stale together
+      key = ( msg[ 'command' ],
+              request.generation,
+              json.dumps( msg.get( 'arguments' ), sort_keys = True ) )
+      primary = self._in_flight.get( key )
+      if primary is not None:
+        # The same request is already queued or in flight, so just wait for its
+        # response
+        request.primary = primary
+        primary.waiters.append( request )
+        self.stats.RecordCoalesced( request )
+        if priority < primary.priority and primary.queued:
+          # Don't leave it waiting behind less urgent requests
+          self._queued_requests[ primary.priority ].remove( primary )
+          primary.priority = priority
+          self._queued_requests[ priority ].append( primary )
+        return request
+
+      request.key = key
+      self._in_flight[ key ] = request
+
+    return request
+
+
+  def NewGeneration( self ):
+    """Called whenever the debuggee stops or resumes. The outstanding requests
+    made with discard_if_stale are now stale: their responses will be ignored,
+    and if the adapter supports it, they are cancelled."""
+    self._generation += 1
+
+    # Requests which haven't been sent yet never need to be
+    for priority, queue in self._queued_requests.items():
+      for request in queue:
+        if request.generation is not None:
+          self._DiscardStale( request )
+          request.queued = False
+      self._queued_requests[ priority ] = collections.deque(
+        request for request in queue if request.queued )
+
+    cancel = []
+    for request in list( self._outstanding_requests.values() ):
+      if request.generation is None or request.stale:
+        continue
+
+      self._DiscardStale( request )
+
+      if self.supports_cancel:
+        cancel.append( self._AddRequest( None, {
+          'command': 'cancel',
+          'arguments': { 'requestId': request.msg[ 'seq' ] },
+        }, lambda reason, msg: None, None ) )
+
+    if cancel:
+      self._logger.debug( 'Cancelling %d stale requests', len( cancel ) )
+      self._SendRequests( cancel )
+
+
+  def _DiscardStale( self, request ):
+    for r in [ request ] + request.waiters:
+      r.stale = True
+      self.stats.RecordDiscarded( r )
+
+    # Don't let new requests wait for this one
+    if self._in_flight.get( request.key ) is request:
+      del self._in_flight[ request.key ]
+
+
+  def QueueDepth( self ):
+    """Return the number of requests in flight, and a dict of priority ->
+    number of requests waiting to be sent."""
+    return ( len( self._outstanding_requests ),
+             { p: len( q ) for p, q in self._queued_requests.items() } )
 
 
   def DoRequestSync( self, msg, timeout = None ):
@@ -97,12 +567,28 @@ class DebugAdapterConnection( object ):
       result[ 'response' ] = msg
       result[ 'exception' ] = RuntimeError( reason )
 
-    self.DoRequest( handler, msg, failure_handler, timeout )
+    # We're blocking the user until it's answered
+    self.DoRequest( handler,
+                    msg,
+                    failure_handler,
+                    timeout,
+                    priority = PRIORITY_USER )
+
+    # Read and handle the server's data as soon as it arrives, rather than
+    # sleeping and waiting for the channel callbacks to fire
+    start = time.monotonic()
+    deadline = start + ( timeout + 1000 ) / 1000.0
+    while not result:
+      remaining = deadline - time.monotonic()
+      if remaining < 0:
+        break
+      self._WaitForData( min( int( remaining * 1000 ) + 1, TIMEOUT_TICK ) )
+      # The timeout timer can't fire while we're waiting here
+      self._ExpireRequests()
 
-    to_wait = timeout + 1000
-    while not result and to_wait >= 0:
-      vim.command( 'sleep 10m' )
-      to_wait -= 10
+    self._logger.debug( 'Waited %.1fms for %s response',
+                        ( time.monotonic() - start ) * 1000,
+                        msg[ 'command' ] )
 
     if result.get( 'exception' ) is not None:
       raise result[ 'exception' ]
@@ -113,18 +599,86 @@ class DebugAdapterConnection( object ):
     return result[ 'response' ]
 
 
-  def OnRequestTimeout( self, timer_id ):
-    request_id = None
+  def _WaitForData( self, timeout ):
+    if self._Pump and int( self._Pump( timeout ) ):
+      return
+
+    # No way to read from the server directly (or it's not connected), so let
+    # vim process the channel callbacks
+    vim.command( 'sleep 10m' )
+
+
+  def PauseTimeouts( self ):
+    """Stop requests timing out until ResumeTimeouts, e.g. while we can't
+    handle their responses, because we're waiting for the user."""
+    if self._timeouts_paused_at is None:
+      self._timeouts_paused_at = time.monotonic()
+    self._StopTimeoutTimer()
+
+  def ResumeTimeouts( self ):
+    """Let requests time out again. Those sent while paused get their full
+    timeout from now; those sent before keep their deadline."""
+    if self._timeouts_paused_at is None:
+      return
+
+    paused_at = self._timeouts_paused_at
+    self._timeouts_paused_at = None
+    now = time.monotonic()
+    self._request_deadlines = []
     for seq, request in self._outstanding_requests.items():
-      if request.expiry_id == timer_id:
-        request_id = seq
-        break
+      if request.sent >= paused_at:
+        request.expiry = now + request.timeout / 1000.0
+      self._request_deadlines.append( ( request.expiry, seq ) )
+    heapq.heapify( self._request_deadlines )
 
-    # Avoid modifying _outstanding_requests while looping
-    if request_id is not None:
-      request = self._outstanding_requests.pop( request_id )
+    if self._outstanding_requests:
+      self._StartTimeoutTimer()
+
+  def OnRequestTimeout( self, timer_id ):
+    if self._timeout_timer is None or int( timer_id ) != self._timeout_timer:
+      # A timer left over from before we were reset
+      vim.eval( 'timer_stop( {} )'.format( timer_id ) )
+      return
+
+    self._ExpireRequests()
+
+  def _ExpireRequests( self ):
+    now = time.monotonic()
+    while ( self._timeouts_paused_at is None and
+            self._request_deadlines and
+            self._request_deadlines[ 0 ][ 0 ] <= now ):
+      expiry, seq = heapq.heappop( self._request_deadlines )
+      request = self._outstanding_requests.get( seq )
+      if request is None or request.expiry != expiry:
+        # Already completed
+        continue
+
+      del self._outstanding_requests[ seq ]
       self._AbortRequest( request, 'Timeout' )
 
+    self._SendQueuedRequests()
+
+    if not self._outstanding_requests:
+      # Don't keep waking up when there's nothing to time out
+      self._request_deadlines = []
+      self._StopTimeoutTimer()
+
+  def _StartTimeoutTimer( self ):
+    if ( self._timeout_timer is not None or
+         self._timeouts_paused_at is not None ):
+      return
+
+    self._timeout_timer = int( vim.eval(
+      'timer_start( {}, "vimspector#internal#channel#Timeout", '
+      '{{ "repeat": -1 }} )'.format( TIMEOUT_TICK ) ) )
+
+  def _StopTimeoutTimer( self ):
+    if self._timeout_timer is None:
+      return
+
+    vim.eval( 'timer_stop( {} )'.format( self._timeout_timer ) )
+    self._timeout_timer = None
+
   def DoResponse( self, request, error, response ):
     this_id = self._next_message_id
     self._next_message_id += 1
@@ -146,15 +700,56 @@ class DebugAdapterConnection( object ):
   def Reset( self ):
     self._Write = None
     self._handlers = None
-
+    self._BuildDispatchTable( [] )
+
+    self._StopTimeoutTimer()
+    self._request_deadlines = []
+    self._in_flight = {}
+    queued = []
+    for queue in self._queued_requests.values():
+      queued.extend( queue )
+      queue.clear()
     while self._outstanding_requests:
       _, request = self._outstanding_requests.popitem()
       self._AbortRequest( request, 'Closing down' )
+    for request in queued:
+      request.queued = False
+      self._AbortRequest( request, 'Closing down' )
+
+  def _BuildDispatchTable( self, handlers ):
+    # Resolve the handler methods once, rather than searching each handler for
+    # every message received. Events and reverse requests that nobody handles
+    # are simply not in the table.
+    self._event_handlers = {}
+    self._request_handlers = {}
+    self._failure_handlers = []
+
+    for h in handlers or []:
+      for name in dir( h ):
+        if name.startswith( 'OnEvent_' ):
+          self._event_handlers.setdefault( name[ len( 'OnEvent_' ) : ],
+                                           [] ).append( getattr( h, name ) )
+        elif name.startswith( 'OnRequest_' ):
+          self._request_handlers.setdefault( name[ len( 'OnRequest_' ) : ],
+                                             [] ).append( getattr( h, name ) )
+        elif name == 'OnFailure':
+          self._failure_handlers.append( h.OnFailure )
 
   def _AbortRequest( self, request, reason ):
     self._logger.debug( '{}: Aborting request {}'.format( reason,
                                                           request.msg ) )
-    _KillTimer( request )
+    if self._in_flight.get( request.key ) is request:
+      del self._in_flight[ request.key ]
+
+    if request.stale:
+      # Nobody is interested in it any more; it was counted when it went stale
+      return
+
+    self.stats.RecordAbort( request )
+
+    if request.batch_failure:
+      request.batch_failure( reason, {} )
+
     if request.failure_handler:
       request.failure_handler( reason, {} )
     else:
@@ -162,161 +757,180 @@ class DebugAdapterConnection( object ):
         request.msg[ 'command' ],
         reason ) )
 
+    for waiter in request.waiters:
+      self._AbortRequest( waiter, reason )
 
-  def OnData( self, data ):
-    data = bytes( data, 'utf-8' )
-    # self._logger.debug( 'Received ({0}/{1}): {2},'.format( type( data ),
-    #                                                   len( data ),
-    #                                                   data ) )
-
-    self._buffer += data
-
-    while True:
-      if self._state == 'READ_HEADER':
-        self._ReadHeaders()
-
-      if self._state == 'READ_BODY':
-        self._ReadBody()
-      else:
-        break
 
-      if self._state != 'READ_HEADER':
-        # We ran out of data whilst reading the body. Await more data.
-        break
+  def OnData( self, data ):
+    self._framer.OnData( bytes( data, 'utf-8' ) )
 
-  def _SetState( self, state ):
-    self._state = state
-    if state == 'READ_HEADER':
-      self._headers = {}
+  def OnMessage( self, message, size = 0 ):
+    """Handle a message which has already been decoded, e.g. by the threaded
+    transport."""
+    self._OnMessageReceived( message, size )
 
   def _SendMessage( self, msg ):
     if not self._Write:
       # Connection was destroyed
       return False
 
-    msg = json.dumps( msg )
-    self._logger.debug( 'Sending Message: {0}'.format( msg ) )
+    if self._recorder:
+      self._recorder.Sent( msg )
 
-    data = 'Content-Length: {0}\r\n\r\n{1}'.format( len( msg ), msg )
-    # self._logger.debug( 'Sending: {0}'.format( data ) )
-    return self._Write( data )
+    return self._Write( self._FrameMessage( msg ) )
 
-  def _ReadHeaders( self ):
-    parts = self._buffer.split( bytes( '\r\n\r\n', 'utf-8' ), 1 )
-
-    if len( parts ) > 1:
-      headers = parts[ 0 ]
-      for header_line in headers.split( bytes( '\r\n', 'utf-8' ) ):
-        if bytes( '\n', 'utf-8' ) in header_line:
-          # Work around bugs in cppdbg where mono spams nonesense to stdout.
-          # This is such a dodgyhack, but it fixes the issues.
-          header_line = header_line.split( bytes( '\n', 'utf-8' ) )[ -1 ]
-
-        if header_line.strip():
-          key, value = str( header_line, 'utf-8' ).split( ':', 1 )
-          self._headers[ key ] = value
-
-      # Chomp (+4 for the 2 newlines which were the separator)
-      # self._buffer = self._buffer[ len( headers[ 0 ] ) + 4 : ]
-      self._buffer = parts[ 1 ]
-      self._SetState( 'READ_BODY' )
+  def _SendRequests( self, requests ):
+    """Queue the requests made by _AddRequest, and send as many queued
+    requests as the in-flight limit allows."""
+    if not self._Write:
+      # Connection was destroyed
+      for request in requests:
+        if request.primary is not None:
+          request.primary.waiters.remove( request )
+      for request in requests:
+        self._AbortRequest( request, 'Unable to send message' )
       return
 
-    # otherwise waiting for more data
+    for request in requests:
+      if request.primary is not None:
+        # Coalesced with a request which was already made
+        continue
+      request.queued = True
+      self._queued_requests[ request.priority ].append( request )
 
-  def _ReadBody( self ):
-    try:
-      content_length = int( self._headers[ 'Content-Length' ] )
-    except KeyError:
-      # Ug oh. We seem to have all the headers, but no Content-Length
-      # Skip to reading headers. Because, what else can we do.
-      self._logger.error( 'Missing Content-Length header in: {0}'.format(
-        json.dumps( self._headers ) ) )
+    self._SendQueuedRequests()
 
-      self._buffer = bytes( '', 'utf-8' )
-      self._SetState( 'READ_HEADER' )
-      return
-
-    if len( self._buffer ) < content_length:
-      # Need more data
-      assert self._state == 'READ_BODY'
+  def _SendQueuedRequests( self ):
+    if not self._Write:
       return
 
-    payload = str( self._buffer[ : content_length ], 'utf-8' )
-    self._buffer = self._buffer[ content_length : ]
-
-    # self._logger.debug( 'Message received (raw): %s', payload )
+    available = None
+    if self.max_in_flight > 0:
+      available = self.max_in_flight - len( self._outstanding_requests )
 
-    try:
-      message = json.loads( payload, strict = False )
-    except Exception:
-      self._logger.exception( "Invalid message received: %s", payload )
-      self._SetState( 'READ_HEADER' )
-      raise
-
-    self._logger.debug( 'Message received: {0}'.format( message ) )
-
-    # We read the message, so the next time we get data from the socket it must
-    # be a header.
-    self._SetState( 'READ_HEADER' )
-    self._OnMessageReceived( message )
+    requests = []
+    for priority in PRIORITIES:
+      queue = self._queued_requests[ priority ]
+      while queue and ( available is None or available > 0 ):
+        requests.append( queue.popleft() )
+        if available is not None:
+          available -= 1
 
+    if not requests:
+      return
 
-  def _OnMessageReceived( self, message ):
+    if self.max_in_flight > 0:
+      self._logger.debug( 'Sending %d requests, %d in flight, queued %s',
+                          len( requests ),
+                          len( self._outstanding_requests ),
+                          [ len( q ) for q in self._queued_requests.values() ] )
+
+    # Everything which can be sent now goes in a single write
+    frames = []
+    now = time.monotonic()
+    for request in requests:
+      this_id = self._next_message_id
+      self._next_message_id += 1
+
+      request.msg[ 'seq' ] = this_id
+      request.msg[ 'type' ] = 'request'
+      request.queued = False
+      request.sent = now
+      request.expiry = now + request.timeout / 1000.0
+      self._outstanding_requests[ this_id ] = request
+      heapq.heappush( self._request_deadlines, ( request.expiry, this_id ) )
+
+      frame = self._FrameMessage( request.msg )
+      # In bytes, like the response sizes; it isn't necessarily ASCII
+      request.size = len( frame.encode( 'utf-8' ) )
+      frames.append( frame )
+      if self._recorder:
+        self._recorder.Sent( request.msg )
+
+    self._StartTimeoutTimer()
+
+    if not self._Write( ''.join( frames ) ):
+      for request in requests:
+        self._outstanding_requests.pop( request.msg[ 'seq' ], None )
+      for request in requests:
+        self._AbortRequest( request, 'Unable to send message' )
+
+  def _FrameMessage( self, msg ):
+    frame = FrameMessage( msg )
+    self._logger.debug( 'Sending Message: %s', frame )
+    return frame
+
+  def _OnMessageReceived( self, message, size = 0 ):
     if not self._handlers:
       return
 
+    if self._recorder:
+      self._recorder.Received( message )
+
     if message[ 'type' ] == 'response':
       try:
-        request = self._outstanding_requests.pop( message[ 'request_seq' ] )
-      except KeyError:
-        # Sigh. It looks like the ms python debug adapter sends duplicate
-        # initialize responses.
-        utils.UserMessage(
-          "Protocol error: duplicate response for request {}".format(
-            message[ 'request_seq' ] ) )
-        self._logger.exception( 'Duplicate response: {}'.format( message ) )
-        return
+        self._OnResponseReceived( message, size )
+      finally:
+        # A slot is free, so send the next request (including any made by the
+        # handlers)
+        self._SendQueuedRequests()
+    elif message[ 'type' ] == 'event':
+      for handler in self._event_handlers.get( message[ 'event' ], () ):
+        handler( message )
+    elif message[ 'type' ] == 'request':
+      for handler in self._request_handlers.get( message[ 'command' ], () ):
+        handler( message )
+
+  def _OnResponseReceived( self, message, size ):
+    try:
+      request = self._outstanding_requests.pop( message[ 'request_seq' ] )
+    except KeyError:
+      # Sigh. It looks like the ms python debug adapter sends duplicate
+      # initialize responses.
+      utils.UserMessage(
+        "Protocol error: duplicate response for request {}".format(
+          message[ 'request_seq' ] ) )
+      self._logger.exception( 'Duplicate response: {}'.format( message ) )
+      return
 
-      _KillTimer( request )
+    self.stats.RecordResponse( request,
+                               message[ 'success' ],
+                               time.monotonic() - request.sent,
+                               size )
+    if self._in_flight.get( request.key ) is request:
+      del self._in_flight[ request.key ]
+
+    if request.stale:
+      # The debuggee has moved on since this was requested, so don't waste
+      # time handling (and drawing) it
+      self._logger.debug( 'Discarding stale response to %s',
+                          request.msg[ 'command' ] )
+      return
 
-      if message[ 'success' ]:
-        if request.handler:
-          request.handler( message )
-      else:
-        reason = message.get( 'message' )
-        error = message.get( 'body', {} ).get( 'error', {} )
-        if error:
-          try:
-            fmt = error[ 'format' ]
-            variables = error.get( 'variables', {} )
-            reason = fmt.format( **variables )
-          except Exception:
-            self._logger.exception( "Failed to parse error, using default: %s",
-                                    error )
-
-        if request.failure_handler:
+    if message[ 'success' ]:
+      for r in [ request ] + request.waiters:
+        if r.handler:
+          r.handler( message )
+    else:
+      reason = message.get( 'message' )
+      error = message.get( 'body', {} ).get( 'error', {} )
+      if error:
+        try:
+          fmt = error[ 'format' ]
+          variables = error.get( 'variables', {} )
+          reason = fmt.format( **variables )
+        except Exception:
+          self._logger.exception( "Failed to parse error, using default: %s",
+                                  error )
+
+      for r in [ request ] + request.waiters:
+        if r.batch_failure:
+          r.batch_failure( reason, message )
+
+        if r.failure_handler:
           self._logger.info( 'Request failed (handled): %s', reason )
-          request.failure_handler( reason, message )
+          r.failure_handler( reason, message )
         else:
           self._logger.error( 'Request failed (unhandled): %s', reason )
-          for h in self._handlers:
-            if 'OnFailure' in dir( h ):
-              h.OnFailure( reason, request.msg, message )
-
-    elif message[ 'type' ] == 'event':
-      method = 'OnEvent_' + message[ 'event' ]
-      for h in self._handlers:
-        if method in dir( h ):
-          getattr( h, method )( message )
-    elif message[ 'type' ] == 'request':
-      method = 'OnRequest_' + message[ 'command' ]
-      for h in self._handlers:
-        if method in dir( h ):
-          getattr( h, method )( message )
-
-
-def _KillTimer( request ):
-  if request.expiry_id is not None:
-    vim.eval( 'timer_stop( {} )'.format( request.expiry_id ) )
-    request.expiry_id = None
+          for handler in self._failure_handlers:
+            handler( reason, r.msg, message )
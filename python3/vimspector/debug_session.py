@@ -13,6 +13,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import copy
 import glob
 import json
 import logging
@@ -20,23 +21,33 @@ import os
 import shlex
 import subprocess
 import functools
+import time
+import typing
 import vim
 import importlib
 
-from vimspector import ( breakpoints,
+from vimspector import ( adapter_pool,
+                         breakpoints,
                          code,
+                         config_cache,
                          core_utils,
                          debug_adapter_connection,
-                         disassembly,
                          install,
+                         json_codec,
                          output,
+                         session_recorder,
                          stack_trace,
                          utils,
                          variables,
                          settings,
                          terminal,
-                         installer )
-from vimspector.vendor.json_minify import minify
+                         threaded_transport )
+
+# The installer (which pulls in urllib, ssl and the archive modules) and the
+# disassembly view are imported when they're first needed, as most sessions
+# don't use them.
+if typing.TYPE_CHECKING:
+  from vimspector import disassembly
 
 # We cache this once, and don't allow it to change (FIXME?)
 VIMSPECTOR_HOME = utils.GetVimspectorBase()
@@ -67,7 +78,7 @@ class DebugSession( object ):
     self._variablesView: variables.VariablesView = None
     self._outputView: output.DAPOutputView = None
     self._codeView: code.CodeView = None
-    self._disassemblyView: disassembly.DisassemblyView = None
+    self._disassemblyView: 'disassembly.DisassemblyView' = None
 
     self._breakpoints = breakpoints.ProjectBreakpoints(
       self._render_emitter,
@@ -85,10 +96,22 @@ class DebugSession( object ):
     self._adapter = None
     self._launch_config = None
 
+    # Kept after the connection closes, so that they can still be inspected
+    self._request_stats = None
+    self._recorder = None
+    # The time that the last start began, and ( phase, time ) since then
+    self._start_time = None
+    self._startup_phases = []
+
     self._ResetServerState()
 
   def _ResetServerState( self ):
     self._connection = None
+    self._transport = None
+    self._warm_adapter = None
+    # Data, ( message, size ) and callbacks from the adapter which arrived
+    # before we were ready for them, in order; None when we are
+    self._held_messages = None
     self._init_complete = False
     self._launch_complete = False
     self._on_init_complete_handlers = []
@@ -96,32 +119,36 @@ class DebugSession( object ):
     utils.SetSessionWindows( {} )
     self.ClearTemporaryBreakpoints()
 
-  def GetConfigurations( self, adapters ):
+  def _LoadConfigurations( self ):
     current_file = utils.GetBufferFilepath( vim.current.buffer )
     filetypes = utils.GetBufferFiletypes( vim.current.buffer )
-    configurations = settings.Dict( 'configurations' )
-
-    for launch_config_file in PathsToAllConfigFiles( VIMSPECTOR_HOME,
-                                                     current_file,
-                                                     filetypes ):
-      self._logger.debug( f'Reading configurations from: {launch_config_file}' )
-      if not launch_config_file or not os.path.exists( launch_config_file ):
-        continue
-
-      with open( launch_config_file, 'r' ) as f:
-        database = json.loads( minify( f.read() ) )
-        configurations.update( database.get( 'configurations' ) or {} )
-        adapters.update( database.get( 'adapters' ) or {} )
-
-    filetype_configurations = configurations
-    if filetypes:
-      # filter out any configurations that have a 'filetypes' list set and it
-      # doesn't contain one of the current filetypes
-      filetype_configurations = {
-        k: c for k, c in configurations.items() if 'filetypes' not in c or any(
-          ft in c[ 'filetypes' ] for ft in filetypes
-        )
-      }
+
+    config_files = list( PathsToAllConfigFiles( VIMSPECTOR_HOME,
+                                                current_file,
+                                                filetypes ) )
+    self._logger.debug( 'Reading configurations from: %s', config_files )
+    database = config_cache.LoadDatabase( config_files,
+                                          settings.Dict( 'configurations' ) )
+
+    # The last one is the .vimspector.json, if any
+    return config_files[ -1 ], filetypes, database
+
+  def GetConfigurationNames( self ):
+    """The names of the configurations for the current buffer's filetype"""
+    _, filetypes, database = self._LoadConfigurations()
+    return database.ConfigurationNames( filetypes )
+
+  def GetConfigurations( self, adapters ):
+    launch_config_file, filetypes, database = self._LoadConfigurations()
+    adapters.update( copy.deepcopy( database.adapters ) )
+
+    configurations = copy.deepcopy( database.configurations )
+    # filter out any configurations that have a 'filetypes' list set and it
+    # doesn't contain one of the current filetypes
+    filetype_configurations = {
+      name: configurations[ name ]
+      for name in database.ConfigurationNames( filetypes )
+    }
 
     return launch_config_file, filetype_configurations, configurations
 
@@ -138,16 +165,20 @@ class DebugSession( object ):
                        launch_variables )
 
     current_file = utils.GetBufferFilepath( vim.current.buffer )
-    adapters = settings.Dict( 'adapters' )
+    adapters = copy.deepcopy( settings.Dict( 'adapters' ) )
 
     launch_config_file = None
-    configurations = None
     if adhoc_configurations:
+      database = config_cache.ConfigDatabase( {}, adhoc_configurations )
       configurations = adhoc_configurations
     else:
-      ( launch_config_file,
-        configurations,
-        all_configurations ) = self.GetConfigurations( adapters )
+      launch_config_file, filetypes, database = self._LoadConfigurations()
+      adapters.update( copy.deepcopy( database.adapters ) )
+      # Only those for the current filetype; these are not modified
+      configurations = {
+        name: database.configurations[ name ]
+        for name in database.ConfigurationNames( filetypes )
+      }
 
     if not configurations:
       utils.UserMessage( 'Unable to find any debug configurations. '
@@ -155,16 +186,11 @@ class DebugSession( object ):
                          'application.' )
       return
 
-    glob.glob( install.GetGadgetDir( VIMSPECTOR_HOME ) )
-    for gadget_config_file in PathsToAllGadgetConfigs( VIMSPECTOR_HOME,
-                                                       current_file ):
-      self._logger.debug( f'Reading gadget config: {gadget_config_file}' )
-      if not gadget_config_file or not os.path.exists( gadget_config_file ):
-        continue
-
-      with open( gadget_config_file, 'r' ) as f:
-        a =  json.loads( minify( f.read() ) ).get( 'adapters' ) or {}
-        adapters.update( a )
+    gadget_config_files = list( PathsToAllGadgetConfigs( VIMSPECTOR_HOME,
+                                                         current_file ) )
+    self._logger.debug( 'Reading gadget config: %s', gadget_config_files )
+    gadget_database = config_cache.LoadDatabase( gadget_config_files )
+    adapters.update( copy.deepcopy( gadget_database.adapters ) )
 
     if 'configuration' in launch_variables:
       configuration_name = launch_variables.pop( 'configuration' )
@@ -197,32 +223,15 @@ class DebugSession( object ):
     else:
       self._workspace_root = os.path.dirname( current_file )
 
-    try:
-      configuration = configurations[ configuration_name ]
-    except KeyError:
-      # Maybe the specified one by name that's not for this filetype? Let's try
-      # that one...
-      configuration = all_configurations[ configuration_name ]
-
-    current_configuration_name = configuration_name
-    while 'extends' in configuration:
-      base_configuration_name = configuration.pop( 'extends' )
-      base_configuration = all_configurations.get( base_configuration_name )
-      if base_configuration is None:
-        raise RuntimeError( f"The adapter { current_configuration_name } "
-                            f"extends configuration { base_configuration_name }"
-                            ", but this does not exist" )
-
-      core_utils.override( base_configuration, configuration )
-      current_configuration_name = base_configuration_name
-      configuration = base_configuration
-
+    # A copy, with anything it extends applied (which is cached)
+    configuration = database.ResolveConfiguration( configuration_name )
 
     adapter = configuration.get( 'adapter' )
     if isinstance( adapter, str ):
       adapter_dict = adapters.get( adapter )
 
       if adapter_dict is None:
+        from vimspector import installer
         suggested_gadgets = installer.FindGadgetForAdapter( adapter )
         if suggested_gadgets:
           response = utils.AskForInput(
@@ -265,6 +274,7 @@ class DebugSession( object ):
       base_adapter = adapters.get( base_adapter_name )
 
       if base_adapter is None:
+        from vimspector import installer
         suggested_gadgets = installer.FindGadgetForAdapter( base_adapter_name )
         if suggested_gadgets:
           response = utils.AskForInput(
@@ -388,18 +398,42 @@ class DebugSession( object ):
       self._logger.info( 'Adapter: %s',
                          json.dumps( self._adapter ) )
 
-      if not self._uiTab:
-        self._SetUpUI()
-      else:
-        with utils.NoAutocommands():
-          vim.current.tabpage = self._uiTab
+      self._start_time = time.monotonic()
+      self._startup_phases = []
 
-      self._Prepare()
-      if not self._StartDebugAdapter():
-        self._logger.info( "Failed to launch or attach to the debug adapter" )
-        return
+      # Start the adapter and send it the initialize request first, so that it
+      # boots while we build the UI. Its messages are held until we're ready for
+      # them. Adapters on a port might need the debuggee (which _Prepare may
+      # launch) or a terminal in the UI, so they still start afterwards.
+      start_adapter_first = 'port' not in self._adapter
+      if start_adapter_first:
+        if not self._StartAdapterAndInitialise():
+          return
+        # The splash is in the tab we're leaving
+        self._splash_screen = utils.HideSplash( self._api_prefix,
+                                                self._splash_screen )
 
-      self._Initialise()
+      try:
+        if not self._uiTab:
+          self._SetUpUI()
+        else:
+          with utils.NoAutocommands():
+            vim.current.tabpage = self._uiTab
+
+        self._Prepare()
+      except Exception:
+        if start_adapter_first:
+          self._AbandonAdapter()
+        raise
+
+      self._RecordStartupPhase( 'ui' )
+
+      if not start_adapter_first:
+        if not self._StartAdapterAndInitialise():
+          return
+      elif self._connection is None:
+        # The adapter went away while we were preparing
+        return
 
       self._stackTraceView.ConnectionUp( self._connection )
       self._variablesView.ConnectionUp( self._connection )
@@ -416,6 +450,8 @@ class DebugSession( object ):
       if self._disassemblyView:
         self._disassemblyView.ConnectionUp( self._connection )
 
+      self._ReleaseHeldMessages()
+
     if self._connection:
       self._logger.debug( "_StopDebugAdapter with callback: start" )
       self._StopDebugAdapter( interactive = False, callback = start )
@@ -423,6 +459,54 @@ class DebugSession( object ):
 
     start()
 
+  def _StartAdapterAndInitialise( self ):
+    # Anything the adapter sends waits for _ReleaseHeldMessages
+    self._held_messages = []
+    if not self._StartDebugAdapter():
+      self._logger.info( "Failed to launch or attach to the debug adapter" )
+      return False
+    self._RecordStartupPhase( 'adapter' )
+
+    # _Prepare might ask the user things (e.g. which process to attach to), so
+    # initialize can't time out until we're ready for its response
+    self._connection.PauseTimeouts()
+
+    self._Initialise()
+    return True
+
+  def _AbandonAdapter( self ):
+    # We started the adapter, but the launch can't go ahead. Stop holding its
+    # messages and let requests time out, so nothing waits on it, and stop it.
+    self._held_messages = None
+    if self._connection is not None:
+      self._connection.ResumeTimeouts()
+      self._StopTransport()
+
+  def _ReleaseHeldMessages( self ):
+    held = self._held_messages
+    self._held_messages = None
+    if self._connection is not None:
+      self._connection.ResumeTimeouts()
+    for message in held or ():
+      if self._connection is None:
+        break
+      if isinstance( message, str ):
+        self._connection.OnData( message )
+      elif callable( message ):
+        message()
+      else:
+        self._connection.OnMessage( *message )
+
+  def _RecordStartupPhase( self, phase ):
+    if self._start_time is None:
+      return
+
+    elapsed = time.monotonic() - self._start_time
+    self._startup_phases.append( ( phase, elapsed ) )
+    self._logger.info( 'Startup phase %s complete after %.1fms',
+                       phase,
+                       elapsed * 1000 )
+
   def Restart( self ):
     if self._configuration is None or self._adapter is None:
       return self.Start()
@@ -470,15 +554,37 @@ class DebugSession( object ):
       # Should _not_ happen, but maybe possible due to races or vim bufs?
       return
 
+    if self._held_messages is not None:
+      self._held_messages.append( data )
+      return
+
+    settings.Refresh()
     self._connection.OnData( data )
 
 
+  def OnChannelMessage( self, message, size ):
+    if self._connection is None:
+      return
+
+    if self._held_messages is not None:
+      self._held_messages.append( ( message, size ) )
+      return
+
+    settings.Refresh()
+    self._connection.OnMessage( message, size )
+
+
   def OnServerStderr( self, data ):
     if self._outputView:
       self._outputView.Print( 'server', data )
 
 
   def OnRequestTimeout( self, timer_id ):
+    if self._connection is None:
+      # The timer belonged to a connection which has since closed
+      vim.eval( f'timer_stop( { timer_id } )' )
+      return
+
     self._connection.OnRequestTimeout( timer_id )
 
   def OnChannelClosed( self ):
@@ -505,6 +611,9 @@ class DebugSession( object ):
     vim.vars[ 'vimspector_resetting' ] = 1
     self._logger.info( "Debugging complete." )
 
+    # The spare adapters are for restarting; don't leave them running
+    adapter_pool.Clear()
+
     def ResetUI():
       if self._stackTraceView:
         self._stackTraceView.Reset()
@@ -561,8 +670,8 @@ class DebugSession( object ):
       return False
 
     try:
-      with open( session_file, 'r' ) as f:
-        session_data = json.load( f )
+      with open( session_file, 'r', encoding = 'utf-8' ) as f:
+        session_data = json_codec.Loads( f.read() )
 
       USER_CHOICES.update(
         session_data.get( 'session', {} ).get( 'user_choices', {} ) )
@@ -598,8 +707,8 @@ class DebugSession( object ):
       session_file = self._DetectSessionFile( invent_one_if_not_found = True )
 
     try:
-      with open( session_file, 'w' ) as f:
-        f.write( json.dumps( {
+      with open( session_file, 'w', encoding = 'utf-8' ) as f:
+        f.write( json_codec.Dumps( {
           'breakpoints': self._breakpoints.Save(),
           'session': {
             'user_choices': USER_CHOICES,
@@ -607,6 +716,9 @@ class DebugSession( object ):
           'variables': self._variablesView.Save() if self._variablesView else {}
         } ) )
 
+      # We might have created it
+      utils.InvalidateConfigFileCache()
+
       utils.UserMessage( f"Wrote { session_file }" )
       return True
     except OSError:
@@ -649,6 +761,8 @@ class DebugSession( object ):
     if not self._server_capabilities.get( 'supportsSteppingGranularity' ):
       arguments.pop( 'granularity' )
 
+    # Anything still being fetched for the current frame is now useless
+    self._connection.NewGeneration()
     self._connection.DoRequest( None, {
       'command': 'next',
       'arguments': arguments,
@@ -673,6 +787,8 @@ class DebugSession( object ):
       'granularity': self._CurrentSteppingGranularity(),
     }
     arguments.update( kwargs )
+    # Anything still being fetched for the current frame is now useless
+    self._connection.NewGeneration()
     self._connection.DoRequest( handler, {
       'command': 'stepIn',
       'arguments': arguments,
@@ -693,6 +809,8 @@ class DebugSession( object ):
       'granularity': self._CurrentSteppingGranularity(),
     }
     arguments.update( kwargs )
+    # Anything still being fetched for the current frame is now useless
+    self._connection.NewGeneration()
     self._connection.DoRequest( handler, {
       'command': 'stepOut',
       'arguments': arguments,
@@ -723,6 +841,7 @@ class DebugSession( object ):
         } )
       self.ClearCurrentPC()
 
+    self._connection.NewGeneration()
     self._connection.DoRequest( handler, {
       'command': 'continue',
       'arguments': {
@@ -820,6 +939,7 @@ class DebugSession( object ):
       utils.UserMessage( "Sorry, server doesn't support that" )
       return
 
+    from vimspector import disassembly
     with utils.LetCurrentWindow( self._codeView._window ):
       vim.command( f'rightbelow { settings.Int( "disassembly_height" ) }new' )
       self._disassemblyView = disassembly.DisassemblyView(
@@ -1215,6 +1335,10 @@ class DebugSession( object ):
         self._adapter[ 'port' ] = port
 
     self._connection_type = self._api_prefix + self._connection_type
+    if ( self._adapter.get( 'threaded_io' ) or
+         adapter_pool.IsPoolable( self._adapter ) ):
+      # Python owns the adapter's pipes or socket; see threaded_transport
+      self._connection_type = 'thread'
     self._logger.debug( f"Connection Type: { self._connection_type }" )
 
     self._adapter[ 'env' ] = self._adapter.get( 'env', {} )
@@ -1253,9 +1377,7 @@ class DebugSession( object ):
           self._codeView._window,
           self._adapter_term )
 
-    if not vim.eval( "vimspector#internal#{}#StartDebugSession( "
-                     "  g:_vimspector_adapter_spec "
-                     ")".format( self._connection_type ) ):
+    if not self._StartTransport():
       self._logger.error( "Unable to start debug server" )
       self._splash_screen = utils.DisplaySplash(
         self._api_prefix,
@@ -1285,17 +1407,86 @@ class DebugSession( object ):
           self._logger.exception( "Unable to load custom adapter %s",
                                   spec )
 
+      self._request_stats = debug_adapter_connection.RequestStats()
+      self._recorder = self._StartRecording()
       self._connection = debug_adapter_connection.DebugAdapterConnection(
         handlers,
-        lambda msg: utils.Call(
-          "vimspector#internal#{}#Send".format( self._connection_type ),
-          msg ),
+        self._SendToTransport,
         self._adapter.get( 'sync_timeout' ),
-        self._adapter.get( 'async_timeout' ) )
+        self._adapter.get( 'async_timeout' ),
+        self._PumpTransport,
+        self._request_stats,
+        self._adapter.get( 'max_in_flight_requests' ),
+        self._recorder,
+        # A warm adapter was already sent initialize, with seq 0
+        first_seq = 1 if self._warm_adapter else 0 )
 
     self._logger.info( 'Debug Adapter Started' )
     return True
 
+  def _StartRecording( self ):
+    path = settings.Get( 'session_recording_file' )
+    if not path:
+      return None
+
+    path = os.path.abspath( os.path.expanduser( path ) )
+    try:
+      return session_recorder.SessionRecorder( path, self._adapter )
+    except OSError as e:
+      self._logger.exception( 'Unable to record the session' )
+      utils.UserMessage( f'Unable to record the session: { e }',
+                         persist = True,
+                         error = True )
+      return None
+
+  def _StopRecording( self ):
+    if self._recorder is not None:
+      self._recorder.Close()
+      self._recorder = None
+
+  def _StartTransport( self ):
+    if self._connection_type == 'thread':
+      self._warm_adapter = adapter_pool.Take( self._adapter )
+      if self._warm_adapter is not None:
+        # Already started; it's adopted in _Initialise
+        self._transport = self._warm_adapter.transport
+        return True
+
+      self._transport = threaded_transport.ThreadedTransport(
+        self.OnChannelMessage,
+        self.OnServerStderr,
+        self.OnServerExit )
+      return self._transport.Start( self._adapter )
+
+    return vim.eval( "vimspector#internal#{}#StartDebugSession( "
+                     "  g:_vimspector_adapter_spec "
+                     ")".format( self._connection_type ) )
+
+  def _SendToTransport( self, msg ):
+    if self._connection_type == 'thread':
+      return self._transport is not None and self._transport.Send( msg )
+
+    return utils.Call(
+      "vimspector#internal#{}#Send".format( self._connection_type ),
+      msg )
+
+  def _PumpTransport( self, timeout ):
+    if self._connection_type == 'thread':
+      return self._transport is not None and self._transport.Pump( timeout )
+
+    return utils.Call(
+      "vimspector#internal#{}#Pump".format( self._connection_type ),
+      timeout )
+
+  def _StopTransport( self ):
+    if self._connection_type == 'thread':
+      if self._transport is not None:
+        self._transport.Stop()
+      return
+
+    vim.eval( 'vimspector#internal#{}#StopDebugSession()'.format(
+      self._connection_type ) )
+
   def _StopDebugAdapter( self, interactive = False, callback = None ):
     arguments = {}
 
@@ -1314,8 +1505,7 @@ class DebugSession( object ):
           assert not self._run_on_server_exit
           self._run_on_server_exit = callback
 
-        vim.eval( 'vimspector#internal#{}#StopDebugSession()'.format(
-          self._connection_type ) )
+        self._StopTransport()
 
       self._connection.DoRequest(
         handler,
@@ -1535,13 +1725,7 @@ class DebugSession( object ):
     # 4. The threads response triggers things like scopes and triggers setting
     #    the current frame.
     #
-    def handle_initialize_response( msg ):
-      self._server_capabilities = msg.get( 'body' ) or {}
-      self._breakpoints.SetServerCapabilities( self._server_capabilities )
-      self._variablesView.SetServerCapabilities( self._server_capabilities )
-      self._Launch()
-
-    self._connection.DoRequest( handle_initialize_response, {
+    initialize_request = {
       'command': 'initialize',
       'arguments': {
         'adapterID': self._adapter.get( 'name', 'adapter' ),
@@ -1556,7 +1740,54 @@ class DebugSession( object ):
         'supportsRunInTerminalRequest': True,
         'supportsMemoryReferences': True
       },
-    } )
+    }
+
+    def handle_initialize_response( msg ):
+      self._RecordStartupPhase( 'initialize' )
+      self._server_capabilities = msg.get( 'body' ) or {}
+      self._connection.supports_cancel = bool(
+        self._server_capabilities.get( 'supportsCancelRequest' ) )
+      self._breakpoints.SetServerCapabilities( self._server_capabilities )
+      self._variablesView.SetServerCapabilities( self._server_capabilities )
+      self._Launch()
+
+      # Get another one ready for the next start or restart, if this adapter
+      # uses the pool
+      adapter_pool.Warm( self._adapter, initialize_request )
+
+    warm = self._warm_adapter
+    self._warm_adapter = None
+    if warm is None:
+      self._connection.DoRequest( handle_initialize_response,
+                                  initialize_request )
+      return
+
+    # This adapter was started, and sent the initialize request, in advance. Its
+    # response may or may not have arrived yet. If it has, Adopt calls this
+    # straight away, which is before the UI is ready, so it waits its turn with
+    # the other messages from the adapter.
+    def handle_warm_initialize_response( msg ):
+      if self._held_messages is not None:
+        self._held_messages.append(
+          functools.partial( handle_warm_initialize_response, msg ) )
+        return
+
+      if self._connection is None:
+        return
+
+      if self._recorder:
+        self._recorder.Sent( warm.initialize_request )
+        self._recorder.Received( msg )
+
+      if msg.get( 'success' ):
+        handle_initialize_response( msg )
+      else:
+        self.OnFailure( msg.get( 'message' ), warm.initialize_request, msg )
+
+    warm.Adopt( self.OnChannelMessage,
+                self.OnServerStderr,
+                self.OnServerExit,
+                handle_warm_initialize_response )
 
 
   def OnFailure( self, reason, request, message ):
@@ -1626,10 +1857,12 @@ class DebugSession( object ):
 
 
   def _OnLaunchComplete( self ):
+    self._RecordStartupPhase( 'launch' )
     self._launch_complete = True
     self._LoadThreadsIfReady()
 
   def _OnInitializeComplete( self ):
+    self._RecordStartupPhase( 'configuration' )
     self._init_complete = True
     self._LoadThreadsIfReady()
 
@@ -1679,6 +1912,7 @@ class DebugSession( object ):
       "Vimspector Debug Info",
       Line(),
       f"ConnectionType: { self._connection_type }",
+      f"JSON Codec: { json_codec.Backend() }",
       "Adapter: " ] + Pretty( self._adapter ) + [
       "Configuration: " ] + Pretty( self._configuration ) + [
       f"API Prefix: { self._api_prefix }",
@@ -1695,6 +1929,72 @@ class DebugSession( object ):
     self.ShowOutput( "DebugInfo" )
 
 
+  def GetStats( self ):
+    """Return the request statistics for the current (or most recent) debug
+    adapter, as a dict of command -> summary"""
+    if self._request_stats is None:
+      return {}
+
+    return self._request_stats.Get()
+
+
+  def PrintStats( self ):
+    stats = self.GetStats()
+    if not stats or self._outputView is None:
+      utils.UserMessage( 'No requests have been sent to the debug adapter' )
+      return
+
+    def Ms( value ):
+      return '-' if value is None else f'{ value:.1f}'
+
+    lines = [
+      'Vimspector Request Stats (latencies in ms, sizes in bytes)',
+      'Coal: requests answered by an identical request already in flight',
+      'Stale: responses discarded because the debuggee had moved on',
+      f'{ "Command":<28}{ "Count":>7}{ "Failed":>7}{ "Abort":>7}{ "Coal":>7}'
+      f'{ "Stale":>7}'
+      f'{ "p50":>9}{ "p95":>9}{ "p99":>9}{ "Max":>9}'
+      f'{ "Req":>9}{ "Resp":>9}{ "MaxResp":>10}',
+    ]
+    if self._connection:
+      in_flight, queued = self._connection.QueueDepth()
+      user, views, background = ( queued[ p ] for p in
+                                  debug_adapter_connection.PRIORITIES )
+      limit = self._connection.max_in_flight or 'none'
+      lines.insert( 1,
+        f'In flight: { in_flight } (limit: { limit }), queued: '
+        f'user { user }, views { views }, background { background }' )
+    if self._startup_phases:
+      lines.insert( 1, 'Startup (ms since start): ' + ', '.join(
+        f'{ phase } { elapsed * 1000:.1f}'
+        for phase, elapsed in self._startup_phases ) )
+    config_files = utils.ConfigFileCacheStats()
+    lines.insert( 1,
+      f'Config file lookups: { config_files[ "lookups" ] }, stat calls: '
+      f'{ config_files[ "stat_calls" ] } (saved by the cache: '
+      f'{ config_files[ "saved" ] })' )
+    for index, ( name, info ) in enumerate(
+        sorted( core_utils.MemoizeStats().items() ) ):
+      lines.insert( 2 + index,
+        f'Cache { name }: hits { info[ "hits" ] }, misses { info[ "misses" ] }'
+        f', evictions { info[ "evictions" ] }, size { info[ "size" ] }' )
+    for command, summary in sorted( stats.items(),
+                              key = lambda item: -item[ 1 ][ 'count' ] ):
+      lines.append(
+        f'{ command:<28}{ summary[ "count" ]:>7}{ summary[ "failed" ]:>7}'
+        f'{ summary[ "aborted" ]:>7}{ summary[ "coalesced" ]:>7}'
+        f'{ summary[ "discarded" ]:>7}'
+        f'{ Ms( summary[ "p50" ] ):>9}{ Ms( summary[ "p95" ] ):>9}'
+        f'{ Ms( summary[ "p99" ] ):>9}{ Ms( summary[ "max" ] ):>9}'
+        f'{ summary[ "mean_request_bytes" ]:>9}'
+        f'{ summary[ "mean_response_bytes" ]:>9}'
+        f'{ summary[ "max_response_bytes" ]:>10}' )
+
+    self._outputView.ClearCategory( 'Stats' )
+    self._outputView.Print( 'Stats', lines )
+    self.ShowOutput( 'Stats' )
+
+
   def OnEvent_loadedSource( self, msg ):
     pass
 
@@ -1782,7 +2082,13 @@ class DebugSession( object ):
     pass
 
   def OnEvent_continued( self, message ):
-    self._stackTraceView.OnContinued( message[ 'body' ] )
+    event = message[ 'body' ]
+    # What we're fetching for the current thread is only stale if it's the one
+    # which continued
+    if ( event.get( 'allThreadsContinued', False ) or
+         event.get( 'threadId' ) == self._stackTraceView.GetCurrentThreadId() ):
+      self._connection.NewGeneration()
+    self._stackTraceView.OnContinued( event )
     self.ClearCurrentPC()
 
   def Clear( self ):
@@ -1802,6 +2108,7 @@ class DebugSession( object ):
       # returns
       self._connection.Reset()
 
+    self._StopRecording()
     self._stackTraceView.ConnectionClosed()
     self._variablesView.ConnectionClosed()
     self._outputView.ConnectionClosed()
@@ -1824,6 +2131,10 @@ class DebugSession( object ):
       self._outputView.OnOutput( message[ 'body' ] )
 
   def OnEvent_stopped( self, message ):
+    if self._start_time is not None:
+      self._RecordStartupPhase( 'first stop' )
+      self._start_time = None
+
     event = message[ 'body' ]
     reason = event.get( 'reason' ) or '<protocol error>'
     description = event.get( 'description' )
@@ -1845,6 +2156,8 @@ class DebugSession( object ):
     if self._outputView:
       self._outputView.Print( 'server', msg )
 
+    # Discard any responses still due for the previous stop
+    self._connection.NewGeneration()
     self._stackTraceView.OnStopped( event )
 
   def BreakpointsAsQuickFix( self ):
@@ -28,10 +28,31 @@ def GetOS():
     return 'linux'
 
 
+# The platform.machine() names we see most, so that we don't need to load
+# cpuinfo to understand them
+KNOWN_MACHINES = {
+  'x86_64': 'x86_64',
+  'amd64': 'x86_64',
+  'x64': 'x86_64',
+  'i386': 'x86',
+  'i486': 'x86',
+  'i586': 'x86',
+  'i686': 'x86',
+  'x86': 'x86',
+  'aarch64': 'arm64',
+  'arm64': 'arm64',
+  'armv7l': 'armv7',
+}
+
+
 @memoize
 def GetPlatform():
   machine = platform.machine()
 
+  known = KNOWN_MACHINES.get( machine.lower() )
+  if known:
+    return known
+
   try:
     from vimspector.vendor import cpuinfo
   except Exception:
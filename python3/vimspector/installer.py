@@ -33,7 +33,7 @@ import traceback
 import zipfile
 import json
 
-from vimspector import install, gadgets
+from vimspector import install, gadgets, json_codec
 
 OUTPUT_VIEW = None
 
@@ -316,7 +316,9 @@ def ReadAdapters( read_existing = True ):
     try:
       with open( install.GetGadgetConfigFile( options.vimspector_base ),
                  'r' ) as f:
-        all_adapters = json.load( f ).get( 'adapters', {} )
+        all_adapters = json_codec.LoadsWithComments( f.read() ).get(
+          'adapters',
+          {} )
     except OSError:
       pass
 
@@ -0,0 +1,93 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# JSON encoding and decoding for DAP messages, session files and
+# configuration. If orjson is importable, it's used; otherwise (or if it
+# rejects the data) we use the standard library, exactly as before.
+
+import json
+import re
+
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+
+# A string or a comment (either of which may be unterminated). Strings are
+# matched so that comment markers inside them are left alone.
+_STRING_OR_COMMENT = re.compile(
+  r'"[^"\\]*(?:\\.[^"\\]*)*(?:"|\Z)|//[^\r\n]*|/\*.*?(?:\*/|\Z)',
+  re.DOTALL )
+_NOT_NEWLINE = re.compile( r'[^\r\n]' )
+
+
+def Backend():
+  return 'orjson' if orjson else 'json'
+
+
+def Loads( data ):
+  """Decode data, which can be a str, bytes, bytearray or memoryview.
+  Control characters within strings are allowed, as some debug adapters send
+  them."""
+  if orjson:
+    try:
+      return orjson.loads( data )
+    except orjson.JSONDecodeError:
+      # orjson is stricter than json with strict = False (e.g. control
+      # characters, NaN, integers larger than 64 bits), so let json have a go
+      pass
+
+  if not isinstance( data, str ):
+    data = str( data, 'utf-8' )
+
+  return json.loads( data, strict = False )
+
+
+def Dumps( obj ):
+  """Encode obj as a str. The result is not necessarily ASCII, so use its UTF-8
+  encoded length for Content-Length."""
+  if orjson:
+    try:
+      return orjson.dumps( obj ).decode( 'utf-8' )
+    except orjson.JSONEncodeError:
+      # e.g. non-str dict keys or very large integers
+      pass
+
+  return json.dumps( obj )
+
+
+def _BlankComment( match ):
+  text = match.group()
+  if text[ 0 ] == '"':
+    return text
+
+  # Replace comments with white space so that the JSON parser reports the
+  # correct line and column numbers on parsing errors.
+  return _NOT_NEWLINE.sub( ' ', text )
+
+
+def StripComments( text ):
+  """Replace any // and /* */ comments in the JSON text with spaces"""
+  if '/' not in text:
+    return text
+
+  return _STRING_OR_COMMENT.sub( _BlankComment, text )
+
+
+def LoadsWithComments( text ):
+  """Decode JSON text which may contain // and /* */ comments, such as
+  .vimspector.json"""
+  return Loads( StripComments( text ) )
@@ -0,0 +1,80 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Records every DAP message exchanged with the debug adapter to a file, one JSON
+# object per line. The first line describes the recording; each subsequent line
+# is:
+#
+#   { "time": <secs>, "direction": "sent"|"received", "message": { ... } }
+#
+# where time is measured from the start of the recording, and "sent" means sent
+# by vimspector to the adapter. The recording can be played back with
+# support/bin/vimspector_replay_adapter.
+
+import logging
+import time
+
+from vimspector import json_codec, utils
+
+RECORDING_VERSION = 1
+
+
+class SessionRecorder( object ):
+  def __init__( self, path, adapter ):
+    self._logger = logging.getLogger( __name__ )
+    utils.SetUpLogging( self._logger )
+
+    self._file = open( path, 'w', encoding = 'utf-8' )
+    self._start = time.monotonic()
+    self._Write( {
+      'vimspector_recording': RECORDING_VERSION,
+      'started': time.time(),
+      'adapter': adapter,
+    } )
+    self._logger.info( 'Recording the debug session to %s', path )
+
+
+  def Sent( self, message ):
+    self._Record( 'sent', message )
+
+
+  def Received( self, message ):
+    self._Record( 'received', message )
+
+
+  def Close( self ):
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+
+  def _Record( self, direction, message ):
+    if self._file is None:
+      return
+
+    self._Write( {
+      'time': round( time.monotonic() - self._start, 6 ),
+      'direction': direction,
+      'message': message,
+    } )
+
+
+  def _Write( self, entry ):
+    try:
+      self._file.write( json_codec.Dumps( entry ) )
+      self._file.write( '\n' )
+    except ( OSError, TypeError, ValueError ):
+      # Don't let a problem with the recording break the debug session
+      self._logger.exception( 'Unable to record message' )
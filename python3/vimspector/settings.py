@@ -16,6 +16,7 @@
 
 import vim
 import builtins
+import copy
 from vimspector import utils
 
 DEFAULTS = {
@@ -40,6 +41,13 @@ DEFAULTS = {
   # Session files
   'session_file_name': '.vimspector.session',
 
+  # Record the DAP messages to this file (see vimspector_replay_adapter)
+  'session_recording_file': '',
+
+  # Adapters with "warm_pool": true (see adapter_pool)
+  'adapter_pool_size': 2,
+  'adapter_pool_idle_timeout': 300,
+
   # Breakpoints
   'toggle_disables_breakpoint': False,
 
@@ -89,10 +97,34 @@ DEFAULTS = {
 }
 
 
+# The settings are read from the g:vimspector_ variables once, and then
+# returned from here until Refresh() is called. That happens whenever Vim calls
+# one of our API functions, or sends us a message from the debug adapter, so
+# changes the user makes are seen, but e.g. placing a sign for each of
+# thousands of breakpoints reads 'sign_priority' once. The values are shared
+# by all callers, so they must not be modified.
+#
+# ( option, type ) -> value
+_snapshot = {}
+
+
+def Refresh():
+  """Forget the values read from the g:vimspector_ variables, as they might
+  have changed"""
+  _snapshot.clear()
+
+
 def Get( option: str, cls=str ):
-  return cls( utils.GetVimValue( vim.vars,
-                                 f'vimspector_{ option }',
-                                 DEFAULTS.get( option, cls() ) ) )
+  try:
+    return _snapshot[ ( option, cls ) ]
+  except KeyError:
+    pass
+
+  value = cls( utils.GetVimValue( vim.vars,
+                                  f'vimspector_{ option }',
+                                  DEFAULTS.get( option, cls() ) ) )
+  _snapshot[ ( option, cls ) ] = value
+  return value
 
 
 def Int( option: str ):
@@ -104,9 +136,16 @@ def Bool( option: str ):
 
 
 def List( option: str ):
-  return utils.GetVimList( vim.vars,
-                           f'vimspector_{ option }',
-                           DEFAULTS.get( option, [] ) )
+  try:
+    return _snapshot[ ( option, list ) ]
+  except KeyError:
+    pass
+
+  value = utils.GetVimList( vim.vars,
+                            f'vimspector_{ option }',
+                            list( DEFAULTS.get( option, [] ) ) )
+  _snapshot[ ( option, list ) ] = value
+  return value
 
 
 # FIXME:
@@ -134,9 +173,17 @@ def _IsList( o ):
 
 
 def Dict( option ):
-  return _UpdateDict(
-    dict( DEFAULTS.get( option, {} ) ),
+  try:
+    return _snapshot[ ( option, dict ) ]
+  except KeyError:
+    pass
+
+  # Copy the defaults, as _UpdateDict modifies the nested dicts
+  value = _UpdateDict(
+    copy.deepcopy( DEFAULTS.get( option, {} ) ),
     DictNoBytes( vim.vars.get( f'vimspector_{ option }', DICT_TYPE() ) ) )
+  _snapshot[ ( option, dict ) ] = value
+  return value
 
 
 def ObjectNoBytes( o ):
@@ -18,7 +18,7 @@ import os
 import logging
 import typing
 
-from vimspector import utils, signs, settings
+from vimspector import debug_adapter_connection, utils, signs, settings
 
 
 class Thread:
@@ -274,10 +274,15 @@ class StackTraceView( object ):
       self._requesting_threads = StackTraceView.ThreadRequestState.NO
       self._pending_thread_request = None
 
+    # Unless we're looking for the current frame, this is just keeping the list
+    # of threads up to date, which can wait
+    priority = ( debug_adapter_connection.PRIORITY_VIEW if infer_current_frame
+                 else debug_adapter_connection.PRIORITY_BACKGROUND )
+
     self._requesting_threads = StackTraceView.ThreadRequestState.REQUESTING
     self._connection.DoRequest( consume_threads, {
       'command': 'threads',
-    }, failure_handler )
+    }, failure_handler, priority = priority )
 
   def _DrawThreads( self ):
     self._line_to_frame.clear()
@@ -330,7 +335,7 @@ class StackTraceView( object ):
       'arguments': {
         'threadId': thread.id,
       }
-    } )
+    }, discard_if_stale = True )
 
 
   def _GetSelectedThread( self ) -> Thread:
@@ -463,6 +468,9 @@ class StackTraceView( object ):
     if thread is None:
       utils.UserMessage( 'No thread selected' )
     elif thread.state == Thread.PAUSED:
+      if thread.id == self._current_thread:
+        # Anything still being fetched for its current frame is now useless
+        self._session._connection.NewGeneration()
       self._session._connection.DoRequest(
         lambda msg: self.OnContinued( {
           'threadId': thread.id,
@@ -0,0 +1,318 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# A transport which talks to the debug adapter from Python worker threads,
+# rather than using vim channels. The reader thread does the framing and JSON
+# decoding, so large responses don't block the editor. Decoded messages are
+# passed to the main thread through a queue, which is drained by a vim timer
+# (and by Pump, for synchronous requests). Nothing here touches vim except on
+# the main thread.
+
+import atexit
+import logging
+import os
+import queue
+import shlex
+import socket
+import subprocess
+import threading
+import time
+import vim
+
+from vimspector import utils
+from vimspector.debug_adapter_connection import MessageFramer
+
+# How often (in ms) the main thread checks for messages from the reader
+DRAIN_INTERVAL = 10
+
+# How long to keep trying to connect to the adapter's port (in seconds)
+CONNECT_TIMEOUT = 10
+
+# How long after Stop() to wait for the adapter to exit, before killing it and
+# giving up on it (in seconds)
+STOP_TIMEOUT = 2
+
+READ_SIZE = 65536
+
+# timer id -> the ThreadedTransport which that drain timer belongs to
+_drain_timers = {}
+
+
+def OnDrainTimer( timer_id ):
+  transport = _drain_timers.get( timer_id )
+  if transport is None:
+    vim.eval( f'timer_stop( { timer_id } )' )
+    return
+
+  transport.Drain()
+
+
+class ThreadedTransport( object ):
+  """Owns the debug adapter's pipes or socket. on_message( message, size ),
+  on_stderr( text ) and on_exit( status ) are always called on the main
+  thread."""
+  def __init__( self, on_message, on_stderr, on_exit ):
+    self._logger = logging.getLogger( __name__ )
+    utils.SetUpLogging( self._logger )
+
+    self._on_message = on_message
+    self._on_stderr = on_stderr
+    self._on_exit = on_exit
+
+    self._process = None
+    self._socket = None
+    self._reader = None
+    self._writer = None
+    self._threads = []
+
+    # Items sent from the worker threads to the main thread
+    self._incoming = queue.SimpleQueue()
+    # Data to write to the adapter; None tells the writer to stop
+    self._outgoing = queue.SimpleQueue()
+
+    self._drain_timer = None
+    self._exited = False
+    # When Stop() gives up waiting for the adapter to exit
+    self._stop_deadline = None
+
+
+  def Start( self, config ):
+    try:
+      if 'port' in config:
+        if 'command' in config and not config.get( 'tty' ):
+          self._process = self._Spawn( config,
+                                       subprocess.DEVNULL,
+                                       subprocess.DEVNULL )
+        self._socket = self._Connect( config )
+        self._reader = self._socket.makefile( 'rb', buffering = 0 )
+        self._writer = self._socket.makefile( 'wb', buffering = 0 )
+      else:
+        self._process = self._Spawn( config,
+                                     subprocess.PIPE,
+                                     subprocess.PIPE )
+        self._reader = self._process.stdout
+        self._writer = self._process.stdin
+        self._StartThread( self._ReadStderr, self._process.stderr )
+    except OSError as e:
+      self._logger.exception( 'Unable to start debug adapter' )
+      utils.UserMessage( f'Unable to start debug adapter: { e }',
+                         persist = True,
+                         error = True )
+      self._Kill()
+      return False
+
+    self._StartThread( self._ReadMessages )
+    self._StartThread( self._WriteMessages )
+
+    # Vim would stop its jobs on exit, so make sure we stop ours too
+    atexit.register( self._Kill )
+
+    self._drain_timer = int( vim.eval(
+      'timer_start( {}, "vimspector#internal#thread#Drain", '
+      '{{ "repeat": -1 }} )'.format( DRAIN_INTERVAL ) ) )
+    _drain_timers[ self._drain_timer ] = self
+    return True
+
+
+  def Send( self, data ):
+    if self._exited or self._stop_deadline is not None:
+      return False
+
+    self._outgoing.put( data.encode( 'utf-8' ) )
+    return True
+
+
+  def Pump( self, timeout ):
+    """Wait up to timeout msec for something from the adapter, and handle
+    everything that has arrived."""
+    if self._exited:
+      return False
+
+    try:
+      item = self._incoming.get( timeout = timeout / 1000.0 )
+    except queue.Empty:
+      self.Drain()
+      return True
+
+    self._Handle( item )
+    self.Drain()
+    return True
+
+
+  def Drain( self ):
+    while True:
+      try:
+        item = self._incoming.get_nowait()
+      except queue.Empty:
+        break
+      self._Handle( item )
+
+    if ( self._stop_deadline is not None and
+         time.monotonic() >= self._stop_deadline ):
+      # The reader didn't notice the exit (e.g. stuck in a read)
+      self._Handle( ( 'exit', 0 ) )
+
+
+  def Stop( self ):
+    """Shut down the adapter. Like Vim's jobs, this doesn't wait for it:
+    whatever it still sends, and then the exit, are handled as usual by the
+    drain timer (or Pump)."""
+    if self._exited or self._stop_deadline is not None:
+      return
+
+    self._stop_deadline = time.monotonic() + STOP_TIMEOUT
+    self._outgoing.put( None )
+    self._Terminate()
+
+
+  def _Handle( self, item ):
+    kind, value = item[ 0 ], item[ 1 : ]
+    if self._exited:
+      return
+
+    if kind == 'message':
+      self._on_message( *value )
+    elif kind == 'stderr':
+      self._on_stderr( *value )
+    elif kind == 'exit':
+      self._exited = True
+      if self._drain_timer is not None:
+        vim.eval( 'timer_stop( {} )'.format( self._drain_timer ) )
+        _drain_timers.pop( self._drain_timer, None )
+        self._drain_timer = None
+      # If we started a server and connected to it, it's no longer any use
+      self._Terminate()
+      atexit.unregister( self._Kill )
+      self._on_exit( *value )
+
+
+  def _Spawn( self, config, stdout, stderr ):
+    command = config[ 'command' ]
+    if isinstance( command, str ):
+      command = shlex.split( command )
+
+    env = os.environ.copy()
+    env.update( config.get( 'env' ) or {} )
+
+    # Unbuffered, so that reads return whatever is available
+    return subprocess.Popen( command,
+                             bufsize = 0,
+                             stdin = subprocess.PIPE,
+                             stdout = stdout,
+                             stderr = stderr,
+                             cwd = config.get( 'cwd' ),
+                             env = env )
+
+
+  def _Connect( self, config ):
+    # Like ch_open with a waittime, keep trying while the adapter starts up
+    address = ( config.get( 'host', '127.0.0.1' ), int( config[ 'port' ] ) )
+    deadline = time.monotonic() + CONNECT_TIMEOUT
+    while True:
+      try:
+        return socket.create_connection( address )
+      except OSError:
+        if time.monotonic() >= deadline:
+          raise
+        time.sleep( 0.1 )
+
+
+  def _Kill( self ):
+    self._Shutdown()
+    self._KillProcess()
+
+
+  def _Terminate( self ):
+    """Like _Kill, but waiting for the process to exit happens on a worker
+    thread, so this doesn't block Vim."""
+    self._Shutdown()
+    if self._process and self._process.poll() is None:
+      threading.Thread( target = self._KillProcess, daemon = True ).start()
+
+
+  def _Shutdown( self ):
+    if self._socket:
+      try:
+        self._socket.shutdown( socket.SHUT_RDWR )
+      except OSError:
+        pass
+
+
+  def _KillProcess( self ):
+    if self._process and self._process.poll() is None:
+      self._process.terminate()
+      try:
+        self._process.wait( timeout = STOP_TIMEOUT )
+      except subprocess.TimeoutExpired:
+        self._process.kill()
+
+
+  def _StartThread( self, target, *args ):
+    thread = threading.Thread( target = target, args = args, daemon = True )
+    thread.start()
+    self._threads.append( thread )
+
+
+  # The following run on worker threads
+
+
+  def _ReadMessages( self ):
+    framer = MessageFramer(
+      lambda message, size: self._incoming.put( ( 'message', message, size ) ) )
+
+    try:
+      while True:
+        data = self._reader.read( READ_SIZE )
+        if not data:
+          break
+        framer.OnData( data )
+    except OSError:
+      self._logger.exception( 'Error reading from the debug adapter' )
+
+    status = 0
+    if self._process and not self._socket:
+      status = self._process.wait()
+    self._incoming.put( ( 'exit', status ) )
+
+
+  def _ReadStderr( self, stream ):
+    try:
+      while True:
+        data = stream.read( READ_SIZE )
+        if not data:
+          break
+        self._incoming.put( ( 'stderr', data.decode( 'utf-8', 'replace' ) ) )
+    except OSError:
+      pass
+
+
+  def _WriteMessages( self ):
+    while True:
+      data = self._outgoing.get()
+      if data is None:
+        break
+      try:
+        # The writer is unbuffered, so may not write everything at once
+        view = memoryview( data )
+        while view:
+          view = view[ self._writer.write( view ) : ]
+      except OSError:
+        self._logger.exception( 'Error writing to the debug adapter' )
+        break
+
+    try:
+      self._writer.close()
+    except OSError:
+      pass
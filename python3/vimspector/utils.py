@@ -25,9 +25,10 @@ import collections
 import re
 import typing
 import base64
+import time
+import concurrent.futures
 
 from vimspector.core_utils import memoize
-from vimspector.vendor.hexdump import hexdump
 
 LOG_FILE = os.path.expanduser( os.path.join( '~', '.vimspector.log' ) )
 
@@ -321,22 +322,78 @@ def DirectoryOfCurrentFile():
   return os.path.dirname( NormalizePath( vim.current.buffer.name ) )
 
 
+# How long (in seconds) the result of searching for a config file from a
+# directory is remembered. Files written within vim invalidate it immediately
+# (see InvalidateConfigFileCache), so this only matters for files created or
+# removed outside of vim.
+CONFIG_FILE_CACHE_TTL = 5
+
+# ( file_name, directory ) -> ( expiry, path or None, stat calls to find it )
+_config_file_cache = {}
+_config_file_stats = collections.Counter()
+
+
 def PathToConfigFile( file_name, from_directory = None ):
+  """Return the path to file_name in from_directory (default: the current
+  directory) or the nearest of its parents, or None if there isn't one. The
+  result is cached for every directory searched, for CONFIG_FILE_CACHE_TTL
+  seconds."""
   if not from_directory:
     p = os.getcwd()
   else:
     p = NormalizePath( os.path.realpath( from_directory ) )
 
+  now = time.monotonic()
+  expiry = now + CONFIG_FILE_CACHE_TTL
+  _config_file_stats[ 'lookups' ] += 1
+
+  # The directories searched; the result is the same for all of them
+  searched = []
   while True:
+    cached = _config_file_cache.get( ( file_name, p ) )
+    if cached is not None and cached[ 0 ] > now:
+      expiry, result, stat_calls = cached
+      _config_file_stats[ 'saved' ] += stat_calls
+      break
+
+    searched.append( p )
     candidate = os.path.join( p, file_name )
+    _config_file_stats[ 'stat_calls' ] += 1
     if os.path.exists( candidate ):
-      return candidate
+      result, stat_calls = candidate, 0
+      break
 
     parent = os.path.dirname( p )
     if parent == p:
-      return None
+      result, stat_calls = None, 0
+      break
     p = parent
 
+  for directory in reversed( searched ):
+    stat_calls += 1
+    _config_file_cache[ ( file_name, directory ) ] = ( expiry,
+                                                       result,
+                                                       stat_calls )
+
+  return result
+
+
+def InvalidateConfigFileCache():
+  """Forget the results of PathToConfigFile, e.g. because a config file was
+  created or deleted."""
+  _config_file_cache.clear()
+
+
+def ConfigFileCacheStats():
+  """Return the number of PathToConfigFile lookups, the number of stat calls
+  they made and the number of stat calls that the cache saved."""
+  return {
+    'lookups': _config_file_stats[ 'lookups' ],
+    'stat_calls': _config_file_stats[ 'stat_calls' ],
+    'saved': _config_file_stats[ 'saved' ],
+    'cached_directories': len( _config_file_cache ),
+  }
+
 
 def Escape( msg ):
   return msg.replace( "'", "''" )
@@ -531,6 +588,11 @@ def ExpandReferencesInObject( obj, mapping, calculus, user_choices ):
   return obj
 
 
+# The number of distinct strings whose parsed ${...} references we remember.
+# Configurations are full of strings, so this is bounded.
+TEMPLATE_CACHE_SIZE = 4096
+
+
 # Based on the python standard library string.Template().substitute, enhanced to
 # add ${name:default} parsing, and to remove the unnecessary generality.
 VAR_MATCH = re.compile(
@@ -584,67 +646,129 @@ def _Substitute( template, mapping ):
   return VAR_MATCH.sub( convert, template )
 
 
+@memoize( maxsize = TEMPLATE_CACHE_SIZE )
+def _CompileTemplate( template ):
+  """Parse template into a tuple of literal strings and ( name, default )
+  references, where default is None for $name and ${name}. If there's an
+  invalid placeholder, the tuple ends with None in its place."""
+  segments = []
+  position = 0
+  for mo in VAR_MATCH.finditer( template ):
+    if mo.start() > position:
+      segments.append( template[ position : mo.start() ] )
+    position = mo.end()
+
+    named = mo.group( 'named' ) or mo.group( 'braced' )
+    if named is not None:
+      segments.append( ( named, None ) )
+    elif mo.group( 'escaped' ) is not None:
+      segments.append( '$' )
+    elif mo.group( 'braceddefault' ) is not None:
+      segments.append( ( mo.group( 'defname' ),
+                         mo.group( 'default' ).replace( '\\}', '}' ) ) )
+    else:
+      segments.append( None )
+      return tuple( segments )
+
+  if position < len( template ):
+    segments.append( template[ position : ] )
+
+  return tuple( segments )
+
+
+def _FindMissingValue( key, default, mapping, calculus, user_choices ):
+  if key in calculus:
+    mapping[ key ] = calculus[ key ]()
+    return
+
+  default_value = user_choices.get( key )
+  # Allow _one_ level of additional substitution. This allows a very real
+  # use case of "program": ${program:${file\\}}
+  if default_value is None and default is not None:
+    try:
+      default_value = _Substitute( default, mapping )
+    except MissingSubstitution as e:
+      if e.name in calculus:
+        default_value = calculus[ e.name ]()
+      else:
+        default_value = default
+
+  mapping[ key ] = AskForInput( 'Enter value for {}: '.format( key ),
+                                default_value,
+                                'file' )
+
+  if mapping[ key ] is None:
+    raise KeyboardInterrupt
+
+  user_choices[ key ] = mapping[ key ]
+
+
+# What os.path.expandvars treats as an environment variable on POSIX
+_ENV_REFERENCE = re.compile( r'\$(\w+|\{[^}]*\})', re.ASCII )
+
+
+@memoize( maxsize = TEMPLATE_CACHE_SIZE )
+def _EnvironmentVariableNames( s ):
+  return tuple( name[ 1 : -1 ] if name.startswith( '{' ) else name
+                for name in _ENV_REFERENCE.findall( s ) )
+
+
+def _ExpandEnvironmentVariables( s ):
+  """Return os.path.expandvars( s ), but without calling it when it wouldn't
+  change anything, which is usually the case for our ${...} references."""
+  if os.name != 'nt':
+    if '$' not in s:
+      return s
+    if not any( name in os.environ for name in _EnvironmentVariableNames( s ) ):
+      return s
+
+  return os.path.expandvars( s )
+
+
 def ExpandReferencesInString( orig_s,
                               mapping,
                               calculus,
                               user_choices ):
   s = os.path.expanduser( orig_s )
-  s = os.path.expandvars( s )
+  s = _ExpandEnvironmentVariables( s )
+  if '$' not in s:
+    return s
 
   # Parse any variables passed in in mapping, and ask for any that weren't,
-  # storing the result in mapping
-  bug_catcher = 0
-  while bug_catcher < 100:
-    ++bug_catcher
+  # storing the result in mapping. The parsed form of the string is cached.
+  parts = []
+  for segment in _CompileTemplate( s ):
+    if segment is None:
+      UserMessage( f'Invalid $ in string { s }: '
+                   f'Invalid placeholder in string { s }',
+                   persist = True )
+      return s
 
-    try:
-      s = _Substitute( s, mapping )
-      break
-    except MissingSubstitution as e:
-      key = e.name
+    if isinstance( segment, str ):
+      parts.append( segment )
+      continue
 
-      if key in calculus:
-        mapping[ key ] = calculus[ key ]()
-      else:
-        default_value = user_choices.get( key )
-        # Allow _one_ level of additional substitution. This allows a very real
-        # use case of "program": ${program:${file\\}}
-        if default_value is None and e.default_value is not None:
-          try:
-            default_value = _Substitute( e.default_value, mapping )
-          except MissingSubstitution as e2:
-            if e2.name in calculus:
-              default_value = calculus[ e2.name ]()
-            else:
-              default_value = e.default_value
-
-        mapping[ key ] = AskForInput( 'Enter value for {}: '.format( key ),
-                                      default_value,
-                                      'file' )
-
-        if mapping[ key ] is None:
-          raise KeyboardInterrupt
-
-        user_choices[ key ] = mapping[ key ]
-        _logger.debug( "Value for %s not set in %s (from %s): set to %s",
-                       key,
-                       s,
-                       orig_s,
-                       mapping[ key ] )
-    except ValueError as e:
-      UserMessage( 'Invalid $ in string {}: {}'.format( s, e ),
-                   persist = True )
-      break
+    key, default = segment
+    if key not in mapping:
+      _FindMissingValue( key, default, mapping, calculus, user_choices )
+      _logger.debug( "Value for %s not set in %s (from %s): set to %s",
+                     key,
+                     s,
+                     orig_s,
+                     mapping[ key ] )
 
-  return s
+    parts.append( str( mapping[ key ] ) )
 
+  return ''.join( parts )
 
-def CoerceType( mapping: typing.Dict[ str, typing.Any ], key: str ):
-  DICT_TYPES = {
-    'json': json.loads,
-    's': str
-  }
 
+DICT_TYPES = {
+  'json': json.loads,
+  's': str
+}
+
+
+def CoerceType( mapping: typing.Dict[ str, typing.Any ], key: str ):
   parts = key.split( '#' )
   if len( parts ) > 1 and parts[ -1 ] in DICT_TYPES.keys():
     value = mapping.pop( key )
@@ -655,6 +779,14 @@ def CoerceType( mapping: typing.Dict[ str, typing.Any ], key: str ):
     mapping[ key ] = DICT_TYPES[ new_type ]( value )
 
 
+def _CoercedName( key: str ):
+  """The name that CoerceType stores the value of key under"""
+  parts = key.split( '#' )
+  if len( parts ) > 1 and parts[ -1 ] in DICT_TYPES.keys():
+    return '#'.join( parts[ 0 : -1 ] )
+  return key
+
+
 # TODO: Should we just run the substitution on the whole JSON string instead?
 # That woul dallow expansion in bool and number values, such as ports etc. ?
 def ExpandReferencesInDict( obj, mapping, calculus, user_choices ):
@@ -666,6 +798,62 @@ def ExpandReferencesInDict( obj, mapping, calculus, user_choices ):
     CoerceType( obj, k )
 
 
+# The most 'shell' variables which are run at the same time
+MAX_CONCURRENT_SHELL_VARIABLES = 8
+
+# Anything that might be a reference to a variable; see VAR_MATCH
+_REFERENCE = re.compile( r'\$\{?([_a-z][_a-z0-9]*)', re.IGNORECASE )
+
+
+def _References( obj ):
+  """The names of the variables that obj might refer to"""
+  if isinstance( obj, str ):
+    return set( _REFERENCE.findall( obj ) )
+
+  if isinstance( obj, dict ):
+    obj = obj.values()
+  elif not isinstance( obj, list ):
+    return set()
+
+  references = set()
+  for item in obj:
+    references.update( _References( item ) )
+  return references
+
+
+# ( cmd, cwd, env ) -> ( expiry, output ) for 'shell' variables with 'cache'
+_shell_variable_cache = {}
+
+
+def ClearShellVariableCache():
+  """Forget the cached output of all 'shell' variables"""
+  _shell_variable_cache.clear()
+
+
+def _RunShellVariable( cmd, cwd, env, cache_key = None, ttl = None ):
+  output = subprocess.check_output( cmd,
+                                    cwd = cwd,
+                                    env = env ).decode( 'utf-8' ).strip()
+  if cache_key is not None:
+    _shell_variable_cache[ cache_key ] = ( time.monotonic() + ttl, output )
+  return output
+
+
+def _CachedShellVariable( cache_key ):
+  cached = _shell_variable_cache.get( cache_key )
+  if cached is None:
+    return None
+
+  expiry, output = cached
+  if expiry <= time.monotonic():
+    _shell_variable_cache.pop( cache_key, None )
+    return None
+
+  future = concurrent.futures.Future()
+  future.set_result( output )
+  return future
+
+
 def ParseVariables( variables_list,
                     mapping,
                     calculus,
@@ -676,45 +864,94 @@ def ParseVariables( variables_list,
   if not isinstance( variables_list, list ):
     variables_list = [ variables_list ]
 
-  variables: typing.Dict[ str, typing.Any ]
-  for variables in variables_list:
-    new_mapping.update( new_variables )
-    for n, v in list( variables.items() ):
-      if isinstance( v, dict ):
-        if 'shell' in v:
-          new_v = v.copy()
-          # Bit of a hack. Allows environment variables to be used.
-          ExpandReferencesInDict( new_v,
-                                  new_mapping,
-                                  calculus,
-                                  user_choices )
-
-          env = os.environ.copy()
-          env.update( new_v.get( 'env' ) or {} )
-          cmd = new_v[ 'shell' ]
-          if not isinstance( cmd, list ):
-            cmd = shlex.split( cmd )
-
-          new_variables[ n ] = subprocess.check_output(
-            cmd,
-            cwd = new_v.get( 'cwd' ) or os.getcwd(),
-            env = env ).decode( 'utf-8' ).strip()
-
-          _logger.debug( "Set new_variables[ %s ] to '%s' from %s from %s",
-                         n,
-                         new_variables[ n ],
-                         new_v,
-                         v )
+  # The commands for 'shell' variables run in the background, so that those
+  # which don't depend on each other run at the same time. We only wait for one
+  # when a later variable refers to it or sets the same name, or at the end.
+  # Everything else (including asking the user for values) happens here, in
+  # the same order as if each command was run in turn.
+  #
+  # name -> ( key, future, defn, expanded defn ) for the commands from the
+  # previous dicts in variables_list, in the order they were started
+  pending = {}
+
+  def Complete( name ):
+    n, future, v, new_v = pending.pop( name )
+    new_variables[ n ] = future.result()
+    _logger.debug( "Set new_variables[ %s ] to '%s' from %s from %s",
+                   n,
+                   new_variables[ n ],
+                   new_v,
+                   v )
+    CoerceType( new_variables, n )
+    new_mapping[ name ] = new_variables[ name ]
+
+  with concurrent.futures.ThreadPoolExecutor(
+      max_workers = MAX_CONCURRENT_SHELL_VARIABLES ) as executor:
+    variables: typing.Dict[ str, typing.Any ]
+    for variables in variables_list:
+      new_mapping.update( new_variables )
+      started = {}
+      for n, v in list( variables.items() ):
+        needed = _References( v )
+        needed.add( _CoercedName( n ) )
+        for name in [ name for name in pending if name in needed ]:
+          Complete( name )
+        # A later key in the same dict which sets the same name wins
+        started.pop( _CoercedName( n ), None )
+
+        if isinstance( v, dict ):
+          if 'shell' in v:
+            new_v = v.copy()
+            # Bit of a hack. Allows environment variables to be used.
+            ExpandReferencesInDict( new_v,
+                                    new_mapping,
+                                    calculus,
+                                    user_choices )
+
+            env = os.environ.copy()
+            env.update( new_v.get( 'env' ) or {} )
+            cmd = new_v[ 'shell' ]
+            if not isinstance( cmd, list ):
+              cmd = shlex.split( cmd )
+            cwd = new_v.get( 'cwd' ) or os.getcwd()
+
+            # Opt in to reusing the output of the same command (with the same
+            # cwd and environment) for 'cache' seconds, or until
+            # :VimspectorClearShellCache if it's true
+            ttl = new_v.get( 'cache' )
+            cache_key = None
+            future = None
+            if ttl:
+              ttl = float( 'inf' ) if ttl is True else float( ttl )
+              cache_key = ( tuple( cmd ), cwd, tuple( sorted( env.items() ) ) )
+              future = _CachedShellVariable( cache_key )
+              if future is not None:
+                _logger.debug( 'Using cached output for %s', n )
+
+            if future is None:
+              future = executor.submit( _RunShellVariable,
+                                        cmd,
+                                        cwd,
+                                        env,
+                                        cache_key,
+                                        ttl )
+            started[ _CoercedName( n ) ] = ( n, future, v, new_v )
+            continue
+          else:
+            raise ValueError(
+              "Unsupported variable defn {}: Missing 'shell'".format( n ) )
         else:
-          raise ValueError(
-            "Unsupported variable defn {}: Missing 'shell'".format( n ) )
-      else:
-        new_variables[ n ] = ExpandReferencesInObject( v,
-                                                       new_mapping,
-                                                       calculus,
-                                                       user_choices )
+          new_variables[ n ] = ExpandReferencesInObject( v,
+                                                         new_mapping,
+                                                         calculus,
+                                                         user_choices )
+
+        CoerceType( new_variables, n )
+
+      pending.update( started )
 
-      CoerceType( new_variables, n )
+    for name in list( pending ):
+      Complete( name )
 
   return new_variables
 
@@ -959,6 +1196,7 @@ class EventEmitter( object ):
 
 
 def Base64ToHexDump( data, base_addr ):
+  from vimspector.vendor.hexdump import hexdump
   data = base64.b64decode( data )
   return list( hexdump( data, result = 'generator', base_address = base_addr ) )
 
@@ -331,6 +331,7 @@ class VariablesView( object ):
   def LoadScopes( self, frame ):
     def scopes_consumer( message ):
       new_scopes = []
+      expanded_scopes = []
       expanded_some_scope = False
       for scope_body in message[ 'body' ][ 'scopes' ]:
         # Find it in the scopes list
@@ -359,24 +360,18 @@ class VariablesView( object ):
           scope.expanded = Expandable.COLLAPSED_BY_DEFAULT
 
         if scope.IsExpanded():
-          self._connection.DoRequest( partial( self._ConsumeVariables,
-                                               self._DrawScopes,
-                                               scope ), {
-            'command': 'variables',
-            'arguments': {
-              'variablesReference': scope.VariablesReference(),
-            },
-          } )
+          expanded_scopes.append( scope )
 
       self._scopes = new_scopes
       self._DrawScopes()
+      self._LoadVariables( self._DrawScopes, expanded_scopes )
 
     self._connection.DoRequest( scopes_consumer, {
       'command': 'scopes',
       'arguments': {
         'frameId': frame[ 'id' ]
       },
-    } )
+    }, discard_if_stale = True )
 
   def _DrawBalloonEval( self ):
     watch = self._variable_eval
@@ -505,16 +500,31 @@ class VariablesView( object ):
     utils.UserMessage( 'No watch found' )
 
   def EvaluateWatches( self, current_frame: dict ):
-    for watch in self._watches:
+    if not self._watches:
+      return
+
+    watches = list( self._watches )
+    for watch in watches:
       watch.SetCurrentFrame( current_frame )
-      self._connection.DoRequest(
-        partial( self._UpdateWatchExpression, watch ),
-        {
-          'command': 'evaluate',
-          'arguments': watch.expression,
-        },
-        failure_handler = lambda reason, msg, watch=watch:
-            self._WatchExpressionFailed( reason, watch ) )
+
+    def handler( results ):
+      expanded_results = []
+      for watch, ( reason, message ) in zip( watches, results ):
+        if reason is None:
+          self._UpdateWatchExpression( watch, message )
+          if ( watch.result.IsExpandable() and
+               watch.result.IsExpanded() ):
+            expanded_results.append( watch.result )
+        else:
+          self._WatchExpressionFailed( reason, watch )
+
+      self._DrawWatches()
+      self._LoadVariables( self._watch.draw, expanded_results )
+
+    self._connection.DoRequests( handler, [ {
+      'command': 'evaluate',
+      'arguments': watch.expression,
+    } for watch in watches ], discard_if_stale = True )
 
   def _UpdateWatchExpression( self, watch: Watch, message: dict ):
     if watch.result is not None:
@@ -522,26 +532,12 @@ class VariablesView( object ):
     else:
       watch.result = WatchResult( message[ 'body' ] )
 
-    if ( watch.result.IsExpandable() and
-         watch.result.IsExpanded() ):
-      self._connection.DoRequest( partial( self._ConsumeVariables,
-                                           self._watch.draw,
-                                           watch.result ), {
-        'command': 'variables',
-        'arguments': {
-          'variablesReference': watch.result.VariablesReference(),
-        },
-      } )
-
-    self._DrawWatches()
-
   def _WatchExpressionFailed( self, reason: str, watch: Watch ):
     if watch.result is not None:
       # We already have a result for this watch. Wut ?
       return
 
     watch.result = WatchFailure( reason )
-    self._DrawWatches()
 
   def _GetVariable( self, buf = None, line_num = None ):
     none = ( None, None )
@@ -784,7 +780,12 @@ class VariablesView( object ):
                            is_short )
 
   def _ConsumeVariables( self, draw, parent, message ):
+    self._UpdateVariables( draw, parent, message )
+    draw()
+
+  def _UpdateVariables( self, draw, parent, message ):
     new_variables = []
+    expanded_variables = []
     for variable_body in message[ 'body' ][ 'variables' ]:
       if parent.variables is None:
         parent.variables = []
@@ -804,18 +805,34 @@ class VariablesView( object ):
       new_variables.append( variable )
 
       if variable.IsExpandable() and variable.IsExpanded():
-        self._connection.DoRequest( partial( self._ConsumeVariables,
-                                             draw,
-                                             variable ), {
-          'command': 'variables',
-          'arguments': {
-            'variablesReference': variable.VariablesReference()
-          },
-        } )
+        expanded_variables.append( variable )
 
     parent.variables = new_variables
 
-    draw()
+    self._LoadVariables( draw, expanded_variables )
+
+  def _LoadVariables( self, draw, parents ):
+    """Request the variables of all of the parents in a single batch, and draw
+    once when they have all been updated."""
+    if not parents:
+      return
+
+    def handler( results ):
+      for parent, ( reason, message ) in zip( parents, results ):
+        # Failures are reported by the connection's default failure handling
+        if reason is None:
+          self._UpdateVariables( draw, parent, message )
+
+      draw()
+
+    self._connection.DoRequests( handler, [ {
+      'command': 'variables',
+      'arguments': {
+        'variablesReference': parent.VariablesReference()
+      },
+    } for parent in parents ],
+      failure_handlers = [ None ] * len( parents ),
+      discard_if_stale = True )
 
   def SetSyntax( self, syntax ):
     # TODO: Switch to View.syntax
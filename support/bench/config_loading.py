@@ -0,0 +1,101 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares loading generated .vimspector.json files of increasing size (with
+# comments) using the vendored json_minify, as we used to, and with
+# json_codec.LoadsWithComments.
+#
+# Run from the root of the repo:
+#
+#   vim --clean -c 'py3file support/bench/config_loading.py' -c 'qa!'
+#
+# Results are printed as messages, so check :messages. json_minify takes time
+# quadratic in the size of the file, so it's only measured for the smaller ones.
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.getcwd(), 'python3' ) )
+
+from vimspector import json_codec  # noqa: E402
+from vimspector.vendor.json_minify import minify  # noqa: E402
+
+
+REPEAT = 3
+
+# The largest number of configurations to time json_minify with
+MINIFY_MAX = 100
+
+
+def Config( count ):
+  lines = [ '{',
+            '  // Generated configurations',
+            '  "configurations": {' ]
+  for i in range( count ):
+    configuration = json.dumps( {
+      'adapter': 'vscode-cpptools',
+      'configuration': {
+        'request': 'launch',
+        'program': f'${{workspaceRoot}}/build/bin/program_{ i }',
+        'args': [ '--url', f'http://localhost:{ 8000 + i }/', '-v' ],
+        'cwd': '${workspaceRoot}',
+        'environment': [ { 'name': 'LEVEL', 'value': str( i ) } ],
+        'MIMode': 'gdb',
+      },
+      'breakpoints': { 'exception': { 'cpp_throw': 'Y', 'cpp_catch': 'N' } },
+    }, indent = 2 )
+    lines.append( f'    /* Configuration { i } */' )
+    lines.append( f'    "Launch { i }": { configuration }'
+                  f'{ "," if i < count - 1 else "" } // { i }' )
+  lines.append( '  }' )
+  lines.append( '}' )
+  return '\n'.join( lines )
+
+
+def Best( f ):
+  best = None
+  for _ in range( REPEAT ):
+    start = time.perf_counter()
+    f()
+    elapsed = time.perf_counter() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def Main():
+  results = []
+  for count in ( 10, 50, 100, 200, 1000, 5000 ):
+    text = Config( count )
+    after = Best( lambda: json_codec.LoadsWithComments( text ) )
+    if count <= MINIFY_MAX:
+      assert ( json_codec.LoadsWithComments( text ) ==
+               json.loads( minify( text ) ) )
+      before = Best( lambda: json.loads( minify( text ) ) )
+      comparison = f'minify { before * 1000:10.3f}ms, ({ before / after:7.1f}x)'
+    else:
+      comparison = 'minify          -'
+
+    results.append( f'{ count:5} configs ({ len( text ) // 1024:6}KiB): '
+                    f'{ comparison }, '
+                    f'LoadsWithComments { after * 1000:8.3f}ms' )
+
+  return results
+
+
+for line in Main():
+  print( line )
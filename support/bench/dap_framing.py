@@ -0,0 +1,193 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Measures the throughput of the DAP message framer when large responses arrive
+# in many small channel chunks, and when many small events arrive at once,
+# compared with the original bytes-based framer.
+#
+# Run from the root of the repo:
+#
+#   vim --clean -c 'py3file support/bench/dap_framing.py' -c 'qa!'
+#
+# Results are printed as messages, so check :messages.
+
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.getcwd(), 'python3' ) )
+
+from vimspector import debug_adapter_connection  # noqa: E402
+
+
+CHUNK_SIZES = [ 512, 4096, 65536 ]
+PAYLOAD_SIZES = [ 64 * 1024, 1024 * 1024, 4 * 1024 * 1024 ]
+EVENT_COUNTS = [ 1000, 10000 ]
+REPEAT = 3
+
+
+class LegacyFramer( object ):
+  """The original framer, which re-sliced a bytes buffer on every chunk. Decoded
+  messages are dispatched in the same way as the real connection so that only
+  the framing differs."""
+  def __init__( self, on_message ):
+    self._buffer = bytes()
+    self._headers = {}
+    self._state = 'READ_HEADER'
+    self._on_message = on_message
+
+  def OnData( self, data ):
+    self._buffer += bytes( data, 'utf-8' )
+    while True:
+      if self._state == 'READ_HEADER':
+        parts = self._buffer.split( b'\r\n\r\n', 1 )
+        if len( parts ) > 1:
+          for header_line in parts[ 0 ].split( b'\r\n' ):
+            if b'\n' in header_line:
+              header_line = header_line.split( b'\n' )[ -1 ]
+            if header_line.strip():
+              key, value = str( header_line, 'utf-8' ).split( ':', 1 )
+              self._headers[ key ] = value
+          self._buffer = parts[ 1 ]
+          self._state = 'READ_BODY'
+
+      if self._state != 'READ_BODY':
+        break
+
+      content_length = int( self._headers[ 'Content-Length' ] )
+      if len( self._buffer ) < content_length:
+        break
+
+      payload = str( self._buffer[ : content_length ], 'utf-8' )
+      self._buffer = self._buffer[ content_length : ]
+      self._state = 'READ_HEADER'
+      self._headers = {}
+      self._on_message( json.loads( payload, strict = False ) )
+
+
+class Counter( object ):
+  def __init__( self ):
+    self.received = 0
+
+  def OnEvent_output( self, message ):
+    self.received += 1
+
+
+def MakeMessage( size ):
+  variables = []
+  index = 0
+  total = 0
+  while total < size:
+    v = {
+      'name': f'member_{ index }',
+      'value': 'x' * 64,
+      'type': 'std::string',
+      'variablesReference': 0,
+    }
+    variables.append( v )
+    total += len( json.dumps( v ) )
+    index += 1
+
+  body = json.dumps( {
+    'seq': 1,
+    'type': 'event',
+    'event': 'output',
+    'body': { 'category': 'stdout', 'output': variables },
+  } )
+  return f'Content-Length: { len( body ) }\r\n\r\n{ body }'
+
+
+def MakeEvents( count ):
+  data = []
+  for index in range( count ):
+    body = json.dumps( {
+      'seq': index,
+      'type': 'event',
+      'event': 'output',
+      'body': { 'category': 'stdout', 'output': f'line { index }\n' },
+    } )
+    data.append( f'Content-Length: { len( body ) }\r\n\r\n{ body }' )
+  return ''.join( data )
+
+
+def Chunk( data, chunk_size ):
+  return [ data[ i : i + chunk_size ]
+           for i in range( 0, len( data ), chunk_size ) ]
+
+
+def Measure( make_framer, chunks, total_bytes, expected = 1 ):
+  best = None
+  for _ in range( REPEAT ):
+    counter = Counter()
+    framer = make_framer( counter )
+    start = time.perf_counter()
+    for chunk in chunks:
+      framer.OnData( chunk )
+    elapsed = time.perf_counter() - start
+    assert counter.received == expected
+    if best is None or elapsed < best:
+      best = elapsed
+
+  return total_bytes / best / ( 1024 * 1024 )
+
+
+def NewFramer( counter ):
+  return debug_adapter_connection.DebugAdapterConnection( [ counter ],
+                                                          lambda msg: True )
+
+
+def OldFramer( counter ):
+  return LegacyFramer( NewFramer( counter )._OnMessageReceived )
+
+
+def Main():
+  # The connection logs every message it decodes; that's not what we're
+  # measuring here.
+  logging.disable( logging.DEBUG )
+
+  results = []
+  for payload_size in PAYLOAD_SIZES:
+    data = MakeMessage( payload_size )
+    for chunk_size in CHUNK_SIZES:
+      chunks = Chunk( data, chunk_size )
+      before = Measure( OldFramer, chunks, len( data ) )
+      after = Measure( NewFramer, chunks, len( data ) )
+      results.append(
+        f'payload { len( data ) // 1024:>6d}KiB '
+        f'chunk { chunk_size:>6d}B: '
+        f'before { before:8.1f} MiB/s, '
+        f'after { after:8.1f} MiB/s '
+        f'({ after / before:5.1f}x)' )
+
+  for event_count in EVENT_COUNTS:
+    data = MakeEvents( event_count )
+    for chunk_size in CHUNK_SIZES:
+      chunks = Chunk( data, chunk_size )
+      before = Measure( OldFramer, chunks, len( data ), event_count )
+      after = Measure( NewFramer, chunks, len( data ), event_count )
+      results.append(
+        f'events  { event_count:>9d} '
+        f'chunk { chunk_size:>6d}B: '
+        f'before { before:8.1f} MiB/s, '
+        f'after { after:8.1f} MiB/s '
+        f'({ after / before:5.1f}x)' )
+
+  return results
+
+
+for line in Main():
+  print( line )
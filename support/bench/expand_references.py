@@ -0,0 +1,100 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Times expanding the ${...} references in a generated adapter and
+# configuration of increasing size, as happens on each launch. The first
+# expansion parses each string; later ones reuse the parsed templates.
+#
+# Run from the root of the repo:
+#
+#   vim --clean -c 'py3file support/bench/expand_references.py' -c 'qa!'
+#
+# Results are printed as messages, so check :messages.
+
+import copy
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.getcwd(), 'python3' ) )
+
+from vimspector import utils  # noqa: E402
+
+
+REPEAT = 5
+
+
+def Spec( count ):
+  return {
+    'adapter': {
+      'command': [ '${gadgetDir}/adapter/bin/adapter', '--port', '${port}' ],
+      'env': { f'VAR_{ i }': f'${{workspaceRoot}}/lib/{ i }'
+               for i in range( count ) },
+    },
+    'configuration': {
+      'request': 'launch',
+      'program': '${workspaceRoot}/build/${program:main}',
+      'args': [ f'--option-{ i }=${{arg_{ i % 10 }}}' for i in range( count ) ]
+              + [ '*${CommandLineArgs}', '--verbose' ],
+      'cwd': '${workspaceRoot}',
+      'stopOnEntry#json': '${StopOnEntry:false}',
+    },
+  }
+
+
+def Mapping():
+  mapping = {
+    'gadgetDir': '/home/user/.vimspector/gadgets',
+    'workspaceRoot': '/home/user/project',
+    'port': 1234,
+    'program': 'main',
+    'CommandLineArgs': 'one "two three" four',
+    'StopOnEntry': 'true',
+  }
+  mapping.update( { f'arg_{ i }': f'value { i }' for i in range( 10 ) } )
+  return mapping
+
+
+def Time( spec ):
+  best = None
+  for _ in range( REPEAT ):
+    spec_copy = copy.deepcopy( spec )
+    start = time.perf_counter()
+    utils.ExpandReferencesInDict( spec_copy, Mapping(), {}, {} )
+    elapsed = time.perf_counter() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def Main():
+  results = []
+  for count in ( 10, 100, 1000, 5000 ):
+    spec = Spec( count )
+    utils._CompileTemplate.cache_clear()
+    spec_copy = copy.deepcopy( spec )
+    start = time.perf_counter()
+    utils.ExpandReferencesInDict( spec_copy, Mapping(), {}, {} )
+    first = time.perf_counter() - start
+    warm = Time( spec )
+
+    results.append( f'{ count:5} args/env: first { first * 1000:8.3f}ms, '
+                    f'then { warm * 1000:8.3f}ms' )
+
+  return results
+
+
+for line in Main():
+  print( line )
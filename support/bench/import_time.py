@@ -0,0 +1,85 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Times `import vimspector.debug_session`, which happens when the first debug
+# session starts, and checks that it doesn't load the modules which we only
+# import when they're used. It must be the first thing to import vimspector in
+# the Vim, so run from the root of the repo with:
+#
+#   vim --clean -c 'py3file support/bench/import_time.py' -c 'qa!'
+#
+# Results are printed as messages, so check :messages. If the import takes
+# longer than the budget (IMPORT_BUDGET_MS, or $VIMSPECTOR_IMPORT_BUDGET_MS) or
+# loads one of the LAZY_MODULES, Vim exits with an error, so this can be used to
+# catch regressions.
+
+import os
+import sys
+import time
+import vim
+
+sys.path.insert( 0, os.path.join( os.getcwd(), 'python3' ) )
+
+
+IMPORT_BUDGET_MS = float( os.environ.get( 'VIMSPECTOR_IMPORT_BUDGET_MS',
+                                          150 ) )
+
+# Modules which a session only needs for some features
+LAZY_MODULES = [
+  'vimspector.installer',
+  'vimspector.gadgets',
+  'vimspector.disassembly',
+  'vimspector.vendor.hexdump',
+  'vimspector.vendor.cpuinfo',
+  'urllib.request',
+]
+
+
+def Main():
+  if 'vimspector' in sys.modules:
+    return [ 'vimspector was already imported; run this in a new Vim' ], False
+
+  before = set( sys.modules )
+  start = time.perf_counter()
+  import vimspector.debug_session  # noqa: F401
+  elapsed = ( time.perf_counter() - start ) * 1000
+  loaded = set( sys.modules ) - before
+
+  vimspector_modules = sorted( m for m in loaded
+                               if m.split( '.' )[ 0 ] == 'vimspector' )
+  results = [
+    f'import vimspector.debug_session: { elapsed:.1f}ms '
+    f'(budget { IMPORT_BUDGET_MS:.0f}ms), { len( loaded ) } modules loaded, '
+    f'{ len( vimspector_modules ) } of them vimspector\'s',
+  ]
+
+  ok = elapsed <= IMPORT_BUDGET_MS
+  if not ok:
+    results.append( 'FAIL: over budget' )
+
+  for module in LAZY_MODULES:
+    if module in loaded:
+      results.append( f'FAIL: { module } should only be imported when used' )
+      ok = False
+
+  return results, ok
+
+
+results, ok = Main()
+for line in results:
+  print( line )
+
+if not ok:
+  vim.command( 'cquit 1' )
@@ -0,0 +1,142 @@
+# vimspector - A multi-language debugging system for Vim
+# Copyright 2026 Ben Jackson
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Compares the JSON codec used for DAP messages with the standard library on
+# payloads shaped like typical large DAP responses (variables, disassemble,
+# stackTrace) and on outgoing requests.
+#
+# Run from the root of the repo:
+#
+#   vim --clean -c 'py3file support/bench/json_codec.py' -c 'qa!'
+#
+# Results are printed as messages, so check :messages. If no faster JSON library
+# (orjson) is installed, both columns measure the standard library.
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert( 0, os.path.join( os.getcwd(), 'python3' ) )
+
+from vimspector import json_codec  # noqa: E402
+
+
+REPEAT = 5
+
+
+def Response( command, body ):
+  return json.dumps( {
+    'seq': 1000,
+    'type': 'response',
+    'request_seq': 999,
+    'command': command,
+    'success': True,
+    'body': body,
+  } ).encode( 'utf-8' )
+
+
+def Variables( count ):
+  return Response( 'variables', { 'variables': [ {
+    'name': f'[{ i }]',
+    'value': f'{{ first = "element { i }", second = { i * 3.5 } }}',
+    'type': 'std::pair<std::string, double>',
+    'evaluateName': f'vec[{ i }]',
+    'variablesReference': 1000 + i,
+    'memoryReference': f'0x{ 0x7ffee000 + i * 40:x}',
+  } for i in range( count ) ] } )
+
+
+def Disassemble( count ):
+  return Response( 'disassemble', { 'instructions': [ {
+    'address': f'0x{ 0x401000 + i * 4:016x}',
+    'instructionBytes': '48 89 e5 90',
+    'instruction': f'mov    rbp, qword ptr [rsp + { i % 64 }]',
+    'symbol': 'main+{}'.format( i * 4 ),
+    'line': 10 + i // 8,
+    'location': { 'name': 'main.cpp', 'path': '/home/user/src/main.cpp' },
+  } for i in range( count ) ] } )
+
+
+def StackTrace( count ):
+  return Response( 'stackTrace', { 'totalFrames': count, 'stackFrames': [ {
+    'id': i,
+    'name': f'namespace::Class::method_{ i }(int, char const*)',
+    'line': i * 7 % 500,
+    'column': 1,
+    'source': {
+      'name': f'file_{ i % 20 }.cpp',
+      'path': f'/home/user/src/project/file_{ i % 20 }.cpp',
+    },
+    'instructionPointerReference': f'0x{ 0x401000 + i * 64:x}',
+  } for i in range( count ) ] } )
+
+
+def Requests( count ):
+  return [ {
+    'seq': i,
+    'type': 'request',
+    'command': 'variables',
+    'arguments': { 'variablesReference': 1000 + i },
+  } for i in range( count ) ]
+
+
+def Best( f ):
+  best = None
+  for _ in range( REPEAT ):
+    start = time.perf_counter()
+    f()
+    elapsed = time.perf_counter() - start
+    if best is None or elapsed < best:
+      best = elapsed
+  return best
+
+
+def Decode( payload ):
+  before = Best( lambda: json.loads( str( payload, 'utf-8' ), strict = False ) )
+  after = Best( lambda: json_codec.Loads( payload ) )
+  return before, after
+
+
+def Encode( messages ):
+  before = Best( lambda: [ json.dumps( m ) for m in messages ] )
+  after = Best( lambda: [ json_codec.Dumps( m ) for m in messages ] )
+  return before, after
+
+
+def Main():
+  results = [ f'JSON codec backend: { json_codec.Backend() }' ]
+
+  cases = [
+    ( 'decode variables x10000', Decode, Variables( 10000 ) ),
+    ( 'decode disassemble x10000', Decode, Disassemble( 10000 ) ),
+    ( 'decode stackTrace x1000', Decode, StackTrace( 1000 ) ),
+    ( 'decode variables x10', Decode, Variables( 10 ) ),
+    ( 'encode requests x10000', Encode, Requests( 10000 ) ),
+  ]
+
+  for name, measure, data in cases:
+    before, after = measure( data )
+    results.append(
+      f'{ name:<28}: '
+      f'json { before * 1000:9.3f}ms, '
+      f'codec { after * 1000:9.3f}ms '
+      f'({ before / after:5.1f}x)' )
+
+  return results
+
+
+for line in Main():
+  print( line )
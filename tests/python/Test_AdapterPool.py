@@ -0,0 +1,134 @@
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+from vimspector import adapter_pool, debug_adapter_connection
+
+# Answers every request, and sends the initialized event after initialize
+FAKE_ADAPTER = '''
+import json, sys
+
+def Send( msg ):
+  body = json.dumps( msg ).encode( 'utf-8' )
+  sys.stdout.buffer.write( b'Content-Length: %d\\r\\n\\r\\n' % len( body ) )
+  sys.stdout.buffer.write( body )
+  sys.stdout.buffer.flush()
+
+sys.stderr.write( 'starting' )
+sys.stderr.flush()
+while True:
+  header = sys.stdin.buffer.readline()
+  if not header:
+    break
+  length = int( header.split( b':' )[ 1 ] )
+  sys.stdin.buffer.readline()
+  request = json.loads( sys.stdin.buffer.read( length ) )
+  Send( { 'seq': 0,
+          'type': 'response',
+          'request_seq': request[ 'seq' ],
+          'command': request[ 'command' ],
+          'success': True,
+          'body': { 'command': request[ 'command' ] } } )
+  if request[ 'command' ] == 'initialize':
+    Send( { 'seq': 1, 'type': 'event', 'event': 'initialized' } )
+'''
+
+SETTINGS = {
+  'adapter_pool_size': 1,
+  'adapter_pool_idle_timeout': 60,
+}
+
+
+class TestAdapterPool( unittest.TestCase ):
+  def setUp( self ):
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup( self.directory.cleanup )
+    settings = patch( 'vimspector.settings.Int', side_effect = SETTINGS.get )
+    settings.start()
+    self.addCleanup( settings.stop )
+    self.addCleanup( adapter_pool.Clear )
+
+  def _Adapter( self, **kwargs ):
+    adapter = {
+      'warm_pool': True,
+      'command': [ sys.executable, '-c', FAKE_ADAPTER ],
+      'env': {},
+      'cwd': self.directory.name,
+    }
+    adapter.update( kwargs )
+    return adapter
+
+  def _Pump( self, transport, until ):
+    deadline = time.monotonic() + 10
+    while not until() and time.monotonic() < deadline:
+      transport.Pump( 100 )
+
+  def test_TakeAndAdopt( self ):
+    adapter = self._Adapter()
+    adapter_pool.Warm( adapter, { 'command': 'initialize' } )
+    adapter_pool.Warm( self._Adapter( port = 1234 ),
+                       { 'command': 'initialize' } )
+    self.assertEqual( adapter_pool.Size(), 1 )
+
+    # Any difference in the spec means a different adapter
+    self.assertIsNone( adapter_pool.Take( self._Adapter( name = 'other' ) ) )
+    self.assertEqual( adapter_pool.Size(), 1 )
+
+    # A copy of the same spec gets the warm one; only once
+    warm = adapter_pool.Take( dict( adapter ) )
+    self.assertIsNotNone( warm )
+    self.assertIsNone( adapter_pool.Take( adapter ) )
+
+    # Let everything arrive before we adopt it
+    time.sleep( 0.5 )
+    warm.transport.Pump( 1000 )
+
+    received = []
+    warm.Adopt( lambda message, size: received.append( message ),
+                lambda text: received.append( text ),
+                lambda status: received.append( 'exit' ),
+                lambda message: received.append( message[ 'body' ] ) )
+    self._Pump( warm.transport, lambda: len( received ) >= 3 )
+    self.assertIn( 'starting', received )
+    received.remove( 'starting' )
+    self.assertEqual( received, [
+      { 'command': 'initialize' },
+      { 'seq': 1, 'type': 'event', 'event': 'initialized' },
+    ] )
+
+    # The adopter carries on from seq 1
+    warm.transport.Send( debug_adapter_connection.FrameMessage( {
+      'seq': 1,
+      'type': 'request',
+      'command': 'launch',
+    } ) )
+    self._Pump( warm.transport, lambda: len( received ) >= 3 )
+    self.assertEqual( received[ 2 ][ 'request_seq' ], 1 )
+
+    warm.Stop()
+    self._Pump( warm.transport, lambda: received[ -1 ] == 'exit' )
+    self.assertEqual( received[ -1 ], 'exit' )
+
+  def test_SizeAndExpiry( self ):
+    first = self._Adapter()
+    adapter_pool.Warm( first, { 'command': 'initialize' } )
+    self.assertEqual( adapter_pool.Size(), 1 )
+
+    # The pool is full, so the oldest is stopped
+    second = self._Adapter( env = { 'DIFFERENT': '1' } )
+    adapter_pool.Warm( second, { 'command': 'initialize' } )
+    self.assertEqual( adapter_pool.Size(), 1 )
+    self.assertIsNone( adapter_pool.Take( first ) )
+
+    adapter_pool.Expire()
+    self.assertEqual( adapter_pool.Size(), 1 )
+    with patch( 'time.monotonic', return_value = time.monotonic() + 61 ):
+      adapter_pool.Expire()
+    self.assertEqual( adapter_pool.Size(), 0 )
+    self.assertIsNone( adapter_pool.Take( second ) )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
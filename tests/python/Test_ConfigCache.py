@@ -0,0 +1,183 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+from vimspector import config_cache, json_codec, utils
+from vimspector.vendor.json_minify import minify
+
+
+class TestConfigCache( unittest.TestCase ):
+  def setUp( self ):
+    config_cache.Clear()
+    utils.InvalidateConfigFileCache()
+    self.directory = tempfile.TemporaryDirectory()
+    self.addCleanup( self.directory.cleanup )
+
+  def _Write( self, name, database, mtime ):
+    path = os.path.join( self.directory.name, name )
+    with open( path, 'w' ) as f:
+      f.write( '// A comment\n' + json.dumps( database ) )
+    os.utime( path, ( mtime, mtime ) )
+    return path
+
+  def test_Read( self ):
+    path = self._Write( 'base.json', { 'adapters': {} }, 1000 )
+    signature = config_cache._Signature( path )
+    database = config_cache._Read( path, signature )
+    self.assertEqual( database, { 'adapters': {} } )
+
+    with patch( 'vimspector.json_codec.LoadsWithComments' ) as loads:
+      self.assertIs( config_cache._Read( path, signature ), database )
+      loads.assert_not_called()
+
+    self._Write( 'base.json', { 'configurations': {} }, 2000 )
+    self.assertNotEqual( config_cache._Signature( path ), signature )
+    self.assertEqual( config_cache._Read( path,
+                                          config_cache._Signature( path ) ),
+                      { 'configurations': {} } )
+    self.assertIsNone( config_cache._Signature(
+      os.path.join( self.directory.name, 'missing' ) ) )
+
+  def test_LoadDatabase( self ):
+    base = self._Write( 'base.json', {
+      'adapters': { 'a': { 'command': 'a' } },
+      'configurations': { 'run': { 'adapter': 'a' } },
+    }, 1000 )
+    local = self._Write( '.vimspector.json', {
+      'configurations': { 'run': { 'adapter': 'b' }, 'test': {} },
+    }, 1000 )
+    paths = [ base, None, os.path.join( self.directory.name, 'missing' ),
+              local ]
+
+    database = config_cache.LoadDatabase( paths, { 'vim': {} } )
+    self.assertEqual( database.adapters, { 'a': { 'command': 'a' } } )
+    self.assertEqual( database.configurations, {
+      'vim': {},
+      'run': { 'adapter': 'b' },
+      'test': {},
+    } )
+
+    with patch( 'vimspector.json_codec.LoadsWithComments' ) as loads:
+      self.assertIs( config_cache.LoadDatabase( paths, { 'vim': {} } ),
+                     database )
+      loads.assert_not_called()
+
+    # Different base configurations make a new database, from the same files
+    with patch( 'vimspector.json_codec.LoadsWithComments' ) as loads:
+      database = config_cache.LoadDatabase( paths )
+      loads.assert_not_called()
+    self.assertNotIn( 'vim', database.configurations )
+
+    # Only the file which changed is parsed again
+    self._Write( '.vimspector.json', {
+      'configurations': { 'debug': {} },
+    }, 2000 )
+    with patch( 'vimspector.json_codec.LoadsWithComments',
+                wraps = json_codec.LoadsWithComments ) as loads:
+      database = config_cache.LoadDatabase( paths )
+      self.assertEqual( loads.call_count, 1 )
+    self.assertEqual( database.configurations, {
+      'run': { 'adapter': 'a' },
+      'debug': {},
+    } )
+
+  def test_ConfigDatabase( self ):
+    database = config_cache.ConfigDatabase( {}, {
+      'c': { 'filetypes': [ 'c', 'cpp' ], 'configuration': { 'a': 1 } },
+      'any': { 'configuration': { 'b': 2 } },
+      'python': { 'filetypes': [ 'python' ] },
+      'cpp': { 'filetypes': 'cpp', 'extends': 'c' },
+      'broken': { 'extends': 'missing' },
+    } )
+
+    self.assertEqual( database.ConfigurationNames( [ 'cpp' ] ),
+                      [ 'c', 'any', 'cpp', 'broken' ] )
+    self.assertEqual( database.ConfigurationNames( [ 'python' ] ),
+                      [ 'any', 'python', 'broken' ] )
+    # A string 'filetypes' is matched as it always was, with 'in'
+    self.assertEqual( database.ConfigurationNames( [ 'python', 'c' ] ),
+                      [ 'c', 'any', 'python', 'cpp', 'broken' ] )
+    self.assertEqual( database.ConfigurationNames( [] ),
+                      [ 'c', 'any', 'python', 'cpp', 'broken' ] )
+
+    resolved = database.ResolveConfiguration( 'cpp' )
+    self.assertEqual( resolved, { 'filetypes': 'cpp',
+                                  'configuration': { 'a': 1 } } )
+    resolved[ 'configuration' ][ 'a' ] = 3
+    self.assertEqual( database.ResolveConfiguration( 'cpp' ),
+                      { 'filetypes': 'cpp', 'configuration': { 'a': 1 } } )
+    self.assertEqual( database.configurations[ 'c' ][ 'configuration' ],
+                      { 'a': 1 } )
+
+    self.assertRaises( KeyError, database.ResolveConfiguration, 'missing' )
+    self.assertRaises( RuntimeError, database.ResolveConfiguration, 'broken' )
+
+  def test_PathToConfigFile( self ):
+    root = os.path.realpath( self.directory.name )
+    deep = os.path.join( root, 'a', 'b', 'c' )
+    os.makedirs( deep )
+    local = self._Write( '.vimspector.json', {}, 1000 )
+    found = os.path.join( root, '.vimspector.json' )
+    self.assertEqual( os.path.realpath( local ), found )
+
+    before = utils.ConfigFileCacheStats()
+    with patch( 'os.path.exists', wraps = os.path.exists ) as exists:
+      self.assertEqual( utils.PathToConfigFile( '.vimspector.json', deep ),
+                        found )
+      self.assertEqual( exists.call_count, 4 )
+
+      # Answered from the cache, for any directory searched
+      self.assertEqual( utils.PathToConfigFile( '.vimspector.json', deep ),
+                        found )
+      self.assertEqual( utils.PathToConfigFile( '.vimspector.json',
+                                                os.path.dirname( deep ) ),
+                        found )
+      self.assertEqual( exists.call_count, 4 )
+
+    after = utils.ConfigFileCacheStats()
+    self.assertEqual( after[ 'lookups' ] - before[ 'lookups' ], 3 )
+    self.assertEqual( after[ 'stat_calls' ] - before[ 'stat_calls' ], 4 )
+    self.assertEqual( after[ 'saved' ] - before[ 'saved' ], 7 )
+
+    # A nearer file isn't seen until the cache is invalidated (or expires)
+    os.rename( found, os.path.join( deep, '.vimspector.json' ) )
+    self.assertEqual( utils.PathToConfigFile( '.vimspector.json', deep ),
+                      found )
+    utils.InvalidateConfigFileCache()
+    self.assertEqual( utils.PathToConfigFile( '.vimspector.json', deep ),
+                      os.path.join( deep, '.vimspector.json' ) )
+
+    with patch( 'vimspector.utils.CONFIG_FILE_CACHE_TTL', 0 ):
+      utils.InvalidateConfigFileCache()
+      self.assertEqual( utils.PathToConfigFile( '.vimspector.json', root ),
+                        None )
+      os.rename( os.path.join( deep, '.vimspector.json' ), found )
+      self.assertEqual( utils.PathToConfigFile( '.vimspector.json', root ),
+                        found )
+
+  def test_StripComments( self ):
+    text = '\n'.join( [
+      '{',
+      '  // A comment with a "quote',
+      '  "url": "http://example.com", /* a\r\n  block */',
+      '  "escaped": "a \\"// not a comment\\" \\\\", // one',
+      '  "slash": "/", "star": "*/" /*/ a comment */',
+      '}',
+    ] )
+    # The same as the minify we used to use, which is much slower
+    self.assertEqual( json_codec.StripComments( text ), minify( text ) )
+    self.assertEqual( len( json_codec.StripComments( text ) ), len( text ) )
+
+    self.assertEqual( json_codec.LoadsWithComments( text ), {
+      'url': 'http://example.com',
+      'escaped': 'a "// not a comment" \\',
+      'slash': '/',
+      'star': '*/',
+    } )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
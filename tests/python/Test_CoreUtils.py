@@ -1,5 +1,6 @@
 import sys
 import unittest
+from unittest.mock import patch
 
 from vimspector import core_utils
 
@@ -74,6 +75,73 @@ class TestOverrideDict( unittest.TestCase ):
                               core_utils.override( *t ) )
 
 
+class TestMemoize( unittest.TestCase ):
+  def test_memoize( self ):
+    calls = []
+
+    @core_utils.memoize
+    def Double( x, y = 0 ):
+      calls.append( x )
+      return x * 2 + y
+
+    self.assertEqual( Double( 1 ), 2 )
+    self.assertEqual( Double( 1 ), 2 )
+    self.assertEqual( Double( 1, y = 1 ), 3 )
+    self.assertEqual( calls, [ 1, 1 ] )
+    self.assertEqual( Double.cache_info(), {
+      'hits': 1,
+      'misses': 2,
+      'evictions': 0,
+      'size': 2,
+      'maxsize': None,
+      'ttl': None,
+    } )
+
+    Double.cache_invalidate( 1 )
+    self.assertEqual( Double( 1, y = 1 ), 3 )
+    self.assertEqual( Double( 1 ), 2 )
+    self.assertEqual( calls, [ 1, 1, 1 ] )
+
+    Double.cache_clear()
+    self.assertEqual( Double( 1 ), 2 )
+    self.assertEqual( calls, [ 1, 1, 1, 1 ] )
+    self.assertIn( f'{ __name__ }.TestMemoize.test_memoize.<locals>.Double',
+                   core_utils.MemoizeStats() )
+
+  def test_memoize_bounded( self ):
+    calls = []
+
+    @core_utils.memoize( maxsize = 2 )
+    def Identity( x ):
+      calls.append( x )
+      return x
+
+    Identity( 1 )
+    Identity( 2 )
+    Identity( 1 )
+    Identity( 3 ) # Evicts 2, the least recently used
+    Identity( 1 )
+    Identity( 2 )
+    self.assertEqual( calls, [ 1, 2, 3, 2 ] )
+    info = Identity.cache_info()
+    self.assertEqual( ( info[ 'size' ], info[ 'evictions' ] ), ( 2, 2 ) )
+
+    now = [ 100.0 ]
+
+    @core_utils.memoize( ttl = 5 )
+    def Expiring( x ):
+      calls.append( x )
+      return x
+
+    with patch( 'time.monotonic', lambda: now[ 0 ] ):
+      Expiring( 4 )
+      now[ 0 ] += 4
+      Expiring( 4 )
+      now[ 0 ] += 1
+      Expiring( 4 )
+    self.assertEqual( calls[ 4 : ], [ 4, 4 ] )
+
+
 assert unittest.main( module=__name__,
                       testRunner=unittest.TextTestRunner( sys.stdout ),
                       exit=False ).result.wasSuccessful()
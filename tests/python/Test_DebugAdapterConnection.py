@@ -0,0 +1,672 @@
+import json
+import sys
+import unittest
+from unittest.mock import patch
+from vimspector import debug_adapter_connection, json_codec
+
+
+def Frame( msg, headers = None ):
+  body = json.dumps( msg )
+  framed = f'Content-Length: { len( body ) }\r\n'
+  for header in ( headers or [] ):
+    framed += header + '\r\n'
+  return framed + '\r\n' + body
+
+
+class Recorder( object ):
+  def __init__( self ):
+    self.events = []
+
+  def OnEvent_output( self, message ):
+    self.events.append( message[ 'body' ] )
+
+
+class Dispatcher( object ):
+  def __init__( self, name, calls ):
+    self.name = name
+    self.calls = calls
+
+  def OnEvent_stopped( self, message ):
+    self.calls.append( ( self.name, 'stopped' ) )
+
+  def OnRequest_runInTerminal( self, message ):
+    self.calls.append( ( self.name, 'runInTerminal' ) )
+
+  def OnFailure( self, reason, request, message ):
+    self.calls.append( ( self.name, 'failure', reason ) )
+
+
+class CustomDispatcher( object ):
+  def __init__( self, calls ):
+    self.calls = calls
+
+  def OnEvent_stopped( self, message ):
+    self.calls.append( ( 'custom', 'stopped' ) )
+
+  def OnEvent_hotcodereplace( self, message ):
+    self.calls.append( ( 'custom', 'hotcodereplace' ) )
+
+
+class TestDebugAdapterConnection( unittest.TestCase ):
+  def __init__( self, *args, **kwargs ):
+    super().__init__( *args, **kwargs )
+    self.maxDiff = 4096
+
+  def _Connection( self ):
+    recorder = Recorder()
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ recorder ],
+      lambda msg: True )
+    self.addCleanup( connection.Reset )
+    return connection, recorder
+
+  def _Events( self, count ):
+    return [ {
+      'seq': i,
+      'type': 'event',
+      'event': 'output',
+      'body': { 'output': f'line { i } ' * i }
+    } for i in range( count ) ]
+
+  def test_OnData_AllAtOnce( self ):
+    connection, recorder = self._Connection()
+    events = self._Events( 5 )
+    connection.OnData( ''.join( Frame( e ) for e in events ) )
+    self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_OnData_EveryChunkSize( self ):
+    events = self._Events( 5 )
+    data = ''.join( Frame( e ) for e in events )
+    for chunk_size in range( 1, 40 ):
+      with self.subTest( chunk_size ):
+        connection, recorder = self._Connection()
+        for i in range( 0, len( data ), chunk_size ):
+          connection.OnData( data[ i : i + chunk_size ] )
+        self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_OnData_ExtraHeadersAndStdoutNoise( self ):
+    connection, recorder = self._Connection()
+    events = self._Events( 2 )
+    connection.OnData( 'mono says hi\n' + Frame( events[ 0 ],
+                                                [ 'X-Other: value' ] ) )
+    connection.OnData( Frame( events[ 1 ] ) )
+    self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_OnData_StdoutNoiseLines( self ):
+    connection, recorder = self._Connection()
+    events = self._Events( 3 )
+    connection.OnData( 'Loaded assembly\r\n' + Frame( events[ 0 ] ) )
+    connection.OnData( Frame( events[ 1 ] ) + 'more noise\n' )
+    connection.OnData( Frame( events[ 2 ] ) )
+    self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_OnData_MultiByteCharacters( self ):
+    connection, recorder = self._Connection()
+    msg = {
+      'seq': 1,
+      'type': 'event',
+      'event': 'output',
+      'body': { 'output': '▶ ●' },
+    }
+    body = json.dumps( msg, ensure_ascii = False )
+    data = ( f'Content-Length: { len( body.encode( "utf-8" ) ) }\r\n\r\n'
+             + body )
+    for c in data:
+      connection.OnData( c )
+    self.assertEqual( recorder.events, [ msg[ 'body' ] ] )
+
+  def test_OnData_MissingContentLength( self ):
+    connection, recorder = self._Connection()
+    events = self._Events( 2 )
+    connection.OnData( 'X-Other: value\r\n\r\n{}' )
+    connection.OnData( Frame( events[ 0 ] ) + Frame( events[ 1 ] ) )
+    self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_OnData_InvalidBody( self ):
+    connection, recorder = self._Connection()
+    events = self._Events( 2 )
+    # The messages after the bad one in the same chunk are still handled
+    connection.OnData( Frame( events[ 0 ] ) +
+                       'Content-Length: 5\r\n\r\n{nope' +
+                       Frame( events[ 1 ] ) )
+    self.assertEqual( recorder.events, [ e[ 'body' ] for e in events ] )
+
+  def test_Dispatch( self ):
+    calls = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ CustomDispatcher( calls ), Dispatcher( 'session', calls ) ],
+      lambda msg: True )
+
+    connection.OnData( Frame( { 'seq': 1,
+                                'type': 'event',
+                                'event': 'stopped' } )
+                       + Frame( { 'seq': 2,
+                                  'type': 'event',
+                                  'event': 'hotcodereplace' } )
+                       + Frame( { 'seq': 3,
+                                  'type': 'event',
+                                  'event': 'nobodyCares' } )
+                       + Frame( { 'seq': 4,
+                                  'type': 'request',
+                                  'command': 'runInTerminal' } ) )
+
+    self.assertEqual( calls, [
+      ( 'custom', 'stopped' ),
+      ( 'session', 'stopped' ),
+      ( 'custom', 'hotcodereplace' ),
+      ( 'session', 'runInTerminal' ),
+    ] )
+
+  def test_Dispatch_UnhandledFailure( self ):
+    calls = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ CustomDispatcher( calls ), Dispatcher( 'session', calls ) ],
+      lambda msg: True )
+    self.addCleanup( connection.Reset )
+
+    connection.DoRequest( None, { 'command': 'next' } )
+    connection.OnData( Frame( {
+      'seq': 1,
+      'type': 'response',
+      'request_seq': 0,
+      'command': 'next',
+      'success': False,
+      'message': 'nope',
+    } ) )
+
+    self.assertEqual( calls, [ ( 'session', 'failure', 'nope' ) ] )
+
+  def test_Dispatch_AfterReset( self ):
+    calls = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Dispatcher( 'session', calls ) ],
+      lambda msg: True )
+    connection.Reset()
+    connection.OnData( Frame( { 'seq': 1,
+                                'type': 'event',
+                                'event': 'stopped' } ) )
+    self.assertEqual( calls, [] )
+
+  def test_RequestTimeout( self ):
+    connection, _ = self._Connection()
+    failures = []
+
+    def Request( command, timeout ):
+      connection.DoRequest(
+        lambda msg: failures.append( ( command, 'success' ) ),
+        { 'command': command },
+        lambda reason, msg: failures.append( ( command, reason ) ),
+        timeout = timeout )
+
+    def Respond( request_seq ):
+      connection.OnData( Frame( {
+        'seq': 100 + request_seq,
+        'type': 'response',
+        'request_seq': request_seq,
+        'command': 'any',
+        'success': True,
+      } ) )
+
+    with patch( 'time.monotonic', return_value = 1000 ):
+      Request( 'slow', 3000 )    # seq 0
+      Request( 'fast', 1000 )    # seq 1
+      Request( 'answered', 500 ) # seq 2
+      Request( 'later', 5000 )   # seq 3
+
+    Respond( 2 )
+    self.assertEqual( failures, [ ( 'answered', 'success' ) ] )
+    timer = connection._timeout_timer
+    self.assertIsNotNone( timer )
+
+    with patch( 'time.monotonic', return_value = 1003 ):
+      connection.OnRequestTimeout( timer )
+
+    self.assertEqual( failures, [
+      ( 'answered', 'success' ),
+      ( 'fast', 'Timeout' ),
+      ( 'slow', 'Timeout' ),
+    ] )
+    self.assertEqual( connection._timeout_timer, timer )
+
+    Respond( 3 )
+    with patch( 'time.monotonic', return_value = 1004 ):
+      connection.OnRequestTimeout( timer )
+
+    self.assertEqual( failures[ -1 ], ( 'later', 'success' ) )
+    self.assertEqual( len( failures ), 4 )
+    self.assertIsNone( connection._timeout_timer )
+
+  def test_PauseTimeouts( self ):
+    connection, _ = self._Connection()
+    failures = []
+
+    def Request( command ):
+      connection.DoRequest(
+        lambda msg: failures.append( 'success' ),
+        { 'command': command },
+        lambda reason, msg: failures.append( ( command, reason ) ),
+        timeout = 1000 )
+
+    with patch( 'time.monotonic', return_value = 999 ):
+      Request( 'before' )
+    with patch( 'time.monotonic', return_value = 1000 ):
+      connection.PauseTimeouts()
+      Request( 'initialize' )
+    self.assertIsNone( connection._timeout_timer )
+
+    # Nothing expires while paused, even when a sync request checks
+    with patch( 'time.monotonic', return_value = 1005 ):
+      connection._ExpireRequests()
+    self.assertEqual( failures, [] )
+
+    # The timeout starts again when resumed, for the requests sent while
+    # paused; the others keep their deadline
+    with patch( 'time.monotonic', return_value = 1010 ):
+      connection.ResumeTimeouts()
+    timer = connection._timeout_timer
+    self.assertIsNotNone( timer )
+
+    with patch( 'time.monotonic', return_value = 1010.5 ):
+      connection.OnRequestTimeout( timer )
+    self.assertEqual( failures, [ ( 'before', 'Timeout' ) ] )
+
+    with patch( 'time.monotonic', return_value = 1011 ):
+      connection.OnRequestTimeout( timer )
+    self.assertEqual( failures, [ ( 'before', 'Timeout' ),
+                                  ( 'initialize', 'Timeout' ) ] )
+
+  def test_DoRequests( self ):
+    writes = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: writes.append( msg ) or True )
+    self.addCleanup( connection.Reset )
+
+    results = []
+    connection.DoRequests( results.append, [
+      { 'command': 'first' },
+      { 'command': 'second' },
+      { 'command': 'third' },
+    ] )
+
+    # All of the requests are sent in a single write
+    self.assertEqual( len( writes ), 1 )
+    self.assertEqual( writes[ 0 ].count( 'Content-Length' ), 3 )
+
+    # Responses arrive out of order; the handler is only called once they have
+    # all arrived, with the results in request order
+    connection.OnData( Frame( { 'seq': 10,
+                                'type': 'response',
+                                'request_seq': 2,
+                                'command': 'third',
+                                'success': True } ) )
+    connection.OnData( Frame( { 'seq': 11,
+                                'type': 'response',
+                                'request_seq': 0,
+                                'command': 'first',
+                                'success': False,
+                                'message': 'nope' } ) )
+    self.assertEqual( results, [] )
+
+    connection.OnData( Frame( { 'seq': 12,
+                                'type': 'response',
+                                'request_seq': 1,
+                                'command': 'second',
+                                'success': True } ) )
+
+    self.assertEqual( len( results ), 1 )
+    self.assertEqual( [ ( reason, msg[ 'command' ] )
+                        for reason, msg in results[ 0 ] ], [
+      ( 'nope', 'first' ),
+      ( None, 'second' ),
+      ( None, 'third' ),
+    ] )
+
+  def test_DoRequests_FailureHandlers( self ):
+    calls = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Dispatcher( 'session', calls ) ],
+      lambda msg: True )
+    self.addCleanup( connection.Reset )
+
+    results = []
+    connection.DoRequests( results.append, [
+      { 'command': 'first' },
+      { 'command': 'second' },
+    ], failure_handlers = [
+      lambda reason, msg: calls.append( ( 'first', 'failure', reason ) ),
+      None,
+    ] )
+
+    for seq in range( 2 ):
+      connection.OnData( Frame( { 'seq': 10 + seq,
+                                  'type': 'response',
+                                  'request_seq': seq,
+                                  'command': 'ignored',
+                                  'success': False,
+                                  'message': f'nope { seq }' } ) )
+
+    # Each failure goes to its own failure handler, or the default handling,
+    # as well as the batch
+    self.assertEqual( calls, [
+      ( 'first', 'failure', 'nope 0' ),
+      ( 'session', 'failure', 'nope 1' ),
+    ] )
+    self.assertEqual( [ reason for reason, _ in results[ 0 ] ],
+                      [ 'nope 0', 'nope 1' ] )
+
+    # Without failure handlers, failures are only reported to the batch
+    del calls[ : ]
+    connection.DoRequests( results.append, [ { 'command': 'third' } ] )
+    connection.OnData( Frame( { 'seq': 12,
+                                'type': 'response',
+                                'request_seq': 2,
+                                'command': 'third',
+                                'success': False,
+                                'message': 'nope' } ) )
+    self.assertEqual( calls, [] )
+    self.assertEqual( results[ 1 ][ 0 ][ 0 ], 'nope' )
+
+  def test_DoRequests_Empty( self ):
+    connection, _ = self._Connection()
+    results = []
+    connection.DoRequests( results.append, [] )
+    self.assertEqual( results, [ [] ] )
+    self.assertIsNone( connection._timeout_timer )
+
+  def test_DoRequestSync_Pump( self ):
+    pumped = []
+
+    def Pump( timeout ):
+      pumped.append( timeout )
+      connection.OnData( Frame( { 'seq': 1,
+                                  'type': 'response',
+                                  'request_seq': 0,
+                                  'command': 'evaluate',
+                                  'success': True,
+                                  'body': { 'result': '42' } } ) )
+      return 1
+
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: True,
+      pump_func = Pump )
+    self.addCleanup( connection.Reset )
+
+    response = connection.DoRequestSync( { 'command': 'evaluate' } )
+    self.assertEqual( response[ 'body' ], { 'result': '42' } )
+    # We returned as soon as the response was handled
+    self.assertEqual( len( pumped ), 1 )
+    self.assertIsNone( connection._timeout_timer )
+
+  def test_DoRequestSync_Timeout( self ):
+    now = [ 1000 ]
+
+    def Pump( timeout ):
+      now[ 0 ] += timeout / 1000.0
+      return 1
+
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: True,
+      pump_func = Pump )
+    self.addCleanup( connection.Reset )
+
+    with patch( 'time.monotonic', side_effect = lambda: now[ 0 ] ):
+      with self.assertRaisesRegex( RuntimeError, 'Timeout' ):
+        connection.DoRequestSync( { 'command': 'evaluate' }, timeout = 500 )
+
+  def test_Stats( self ):
+    connection, _ = self._Connection()
+
+    now = [ 1000 ]
+    with patch( 'time.monotonic', side_effect = lambda: now[ 0 ] ):
+      for index in range( 100 ):
+        connection.DoRequest( None, { 'command': 'variables' } )
+        now[ 0 ] += ( index + 1 ) / 1000.0
+        connection.OnData( Frame( { 'seq': index,
+                                    'type': 'response',
+                                    'request_seq': index,
+                                    'command': 'variables',
+                                    'success': True } ) )
+
+      connection.DoRequest( None,
+                            { 'command': 'evaluate' },
+                            lambda reason, msg: None )
+      connection.OnData( Frame( { 'seq': 100,
+                                  'type': 'response',
+                                  'request_seq': 100,
+                                  'command': 'evaluate',
+                                  'success': False } ) )
+      connection.DoRequest( None,
+                            { 'command': 'evaluate' },
+                            lambda reason, msg: None,
+                            timeout = 10 )
+      now[ 0 ] += 1
+      connection.OnRequestTimeout( connection._timeout_timer )
+
+    stats = connection.stats.Get()
+    self.assertEqual( set( stats ), { 'variables', 'evaluate' } )
+
+    variables = stats[ 'variables' ]
+    self.assertEqual( variables[ 'count' ], 100 )
+    self.assertEqual( variables[ 'failed' ], 0 )
+    self.assertEqual( variables[ 'p50' ], 50.0 )
+    self.assertEqual( variables[ 'p95' ], 95.0 )
+    self.assertEqual( variables[ 'p99' ], 99.0 )
+    self.assertEqual( variables[ 'max' ], 100.0 )
+    self.assertGreater( variables[ 'mean_request_bytes' ], 0 )
+    self.assertGreater( variables[ 'mean_response_bytes' ], 0 )
+
+    evaluate = stats[ 'evaluate' ]
+    self.assertEqual( evaluate[ 'count' ], 1 )
+    self.assertEqual( evaluate[ 'failed' ], 1 )
+    self.assertEqual( evaluate[ 'aborted' ], 1 )
+
+  def test_SendNonAscii( self ):
+    writes = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: writes.append( msg ) or True )
+    self.addCleanup( connection.Reset )
+
+    connection.DoRequest( None, {
+      'command': 'evaluate',
+      'arguments': { 'expression': 'résumé ●' },
+    } )
+
+    header, body = writes[ 0 ].split( '\r\n\r\n', 1 )
+    self.assertEqual( header,
+                      f'Content-Length: { len( body.encode( "utf-8" ) ) }' )
+    self.assertEqual( json_codec.Loads( body )[ 'arguments' ][ 'expression' ],
+                      'résumé ●' )
+
+    # The size of the request is counted in bytes
+    connection.OnData( Frame( { 'seq': 1,
+                                'type': 'response',
+                                'request_seq': 0,
+                                'command': 'evaluate',
+                                'success': True } ) )
+    self.assertEqual(
+      connection.stats.Get()[ 'evaluate' ][ 'mean_request_bytes' ],
+      len( writes[ 0 ].encode( 'utf-8' ) ) )
+
+  def test_Codec_Lenient( self ):
+    # Control characters in strings, as sent by some adapters
+    self.assertEqual( json_codec.Loads( b'{"output": "a\tb\nc"}' ),
+                      { 'output': 'a\tb\nc' } )
+    self.assertEqual( json_codec.Loads( '{"value": 18446744073709551616}' ),
+                      { 'value': 18446744073709551616 } )
+    self.assertEqual( json_codec.Loads( json_codec.Dumps( { 1: 'one' } ) ),
+                      { '1': 'one' } )
+
+  def test_Coalesce( self ):
+    writes = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: writes.append( msg ) or True )
+    self.addCleanup( connection.Reset )
+
+    responses = []
+
+    def Variables( name, reference ):
+      connection.DoRequest(
+        lambda msg: responses.append( ( name, msg[ 'request_seq' ] ) ),
+        { 'command': 'variables',
+          'arguments': { 'variablesReference': reference } } )
+
+    Variables( 'scopes', 1 )
+    Variables( 'watch', 1 )
+    Variables( 'other', 2 )
+    connection.DoRequests(
+      lambda results: responses.append( ( 'batch', len( results ) ) ),
+      [ { 'command': 'variables',
+          'arguments': { 'variablesReference': 1 } } ] )
+
+    # Only one request for each distinct variablesReference went on the wire
+    self.assertEqual( len( writes ), 2 )
+
+    connection.OnData( Frame( { 'seq': 10,
+                                'type': 'response',
+                                'request_seq': 0,
+                                'command': 'variables',
+                                'success': True } ) )
+    self.assertEqual( responses, [
+      ( 'scopes', 0 ),
+      ( 'watch', 0 ),
+      ( 'batch', 1 ),
+    ] )
+
+    # Once answered, the same request is sent again
+    Variables( 'hover', 1 )
+    self.assertEqual( len( writes ), 3 )
+
+    stats = connection.stats.Get()[ 'variables' ]
+    self.assertEqual( stats[ 'coalesced' ], 2 )
+    self.assertEqual( stats[ 'count' ], 1 )
+
+    # Waiters are aborted along with the request they're waiting for
+    failures = []
+    connection.DoRequest( None,
+                          { 'command': 'source',
+                            'arguments': { 'sourceReference': 3 } },
+                          lambda reason, msg: failures.append( reason ) )
+    connection.DoRequest( None,
+                          { 'command': 'source',
+                            'arguments': { 'sourceReference': 3 } },
+                          lambda reason, msg: failures.append( reason ) )
+    connection.Reset()
+    self.assertEqual( failures, [ 'Closing down', 'Closing down' ] )
+
+  def test_DiscardStale( self ):
+    writes = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: writes.append( msg ) or True )
+    self.addCleanup( connection.Reset )
+
+    responses = []
+    connection.DoRequest( lambda msg: responses.append( 'scopes' ),
+                          { 'command': 'scopes',
+                            'arguments': { 'frameId': 1 } },
+                          discard_if_stale = True )
+    connection.DoRequests( lambda results: responses.append( 'watches' ),
+                           [ { 'command': 'evaluate',
+                               'arguments': { 'expression': 'x' } } ],
+                           discard_if_stale = True )
+    connection.DoRequest( lambda msg: responses.append( 'hover' ),
+                          { 'command': 'evaluate',
+                            'arguments': { 'expression': 'y' } } )
+
+    # The user steps; the adapter doesn't support cancel
+    connection.NewGeneration()
+    self.assertEqual( len( writes ), 3 )
+
+    # A new request for the same frame isn't coalesced with the stale one
+    connection.DoRequest( lambda msg: responses.append( 'new scopes' ),
+                          { 'command': 'scopes',
+                            'arguments': { 'frameId': 1 } },
+                          discard_if_stale = True )
+    self.assertEqual( len( writes ), 4 )
+
+    for seq, command in enumerate( [ 'scopes', 'evaluate', 'evaluate',
+                                     'scopes' ] ):
+      connection.OnData( Frame( { 'seq': 10 + seq,
+                                  'type': 'response',
+                                  'request_seq': seq,
+                                  'command': command,
+                                  'success': True } ) )
+
+    self.assertEqual( responses, [ 'hover', 'new scopes' ] )
+    self.assertEqual( connection.stats.Get()[ 'scopes' ][ 'discarded' ], 1 )
+    self.assertEqual( connection.stats.Get()[ 'evaluate' ][ 'discarded' ], 1 )
+
+    # When the adapter supports it, stale requests are cancelled
+    connection.supports_cancel = True
+    connection.DoRequest( lambda msg: responses.append( 'stack' ),
+                          { 'command': 'stackTrace',
+                            'arguments': { 'threadId': 1 } },
+                          discard_if_stale = True )
+    connection.NewGeneration()
+    cancel = json_codec.Loads( writes[ -1 ].split( '\r\n\r\n', 1 )[ 1 ] )
+    self.assertEqual( cancel[ 'command' ], 'cancel' )
+    self.assertEqual( cancel[ 'arguments' ], { 'requestId': 4 } )
+
+    # Stale requests don't report failures either
+    connection.Reset()
+    self.assertEqual( responses, [ 'hover', 'new scopes' ] )
+
+  def test_InFlightLimit( self ):
+    writes = []
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: writes.append( msg ) or True,
+      max_in_flight = 2 )
+    self.addCleanup( connection.Reset )
+
+    def Sent():
+      return [ json_codec.Loads( frame.split( '\r\n\r\n', 1 )[ 1 ] )
+               for write in writes
+               for frame in write.split( 'Content-Length' )[ 1 : ] ]
+
+    def Respond( request_seq ):
+      connection.OnData( Frame( { 'seq': 100 + request_seq,
+                                  'type': 'response',
+                                  'request_seq': request_seq,
+                                  'command': 'any',
+                                  'success': True } ) )
+
+    results = []
+    connection.DoRequests( results.append, [
+      { 'command': 'variables', 'arguments': { 'variablesReference': i } }
+      for i in range( 3 ) ] )
+    background = debug_adapter_connection.PRIORITY_BACKGROUND
+    connection.DoRequest( None,
+                          { 'command': 'threads' },
+                          priority = background )
+    connection.DoRequest( None, { 'command': 'next' } )
+
+    self.assertEqual( [ m[ 'seq' ] for m in Sent() ], [ 0, 1 ] )
+    self.assertEqual( connection.QueueDepth(), ( 2, { 0: 1, 1: 1, 2: 1 } ) )
+
+    # The step goes first, then the rest of the view data, then the background
+    # request
+    Respond( 0 )
+    Respond( 1 )
+    Respond( 2 )
+    self.assertEqual( [ ( m[ 'seq' ], m[ 'command' ] ) for m in Sent() ], [
+      ( 0, 'variables' ),
+      ( 1, 'variables' ),
+      ( 2, 'next' ),
+      ( 3, 'variables' ),
+      ( 4, 'threads' ),
+    ] )
+    self.assertEqual( results, [] )
+    Respond( 3 )
+    self.assertEqual( len( results ), 1 )
+    self.assertEqual( connection.QueueDepth(), ( 1, { 0: 0, 1: 0, 2: 0 } ) )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,66 @@
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+from vimspector import debug_adapter_connection, debug_session
+
+
+class TestDebugSession( unittest.TestCase ):
+  def test_StartFailsInPrepare( self ):
+    session = debug_session.DebugSession( '' )
+    writes = []
+    stopped = []
+
+    def StartDebugAdapter():
+      session._connection = debug_adapter_connection.DebugAdapterConnection(
+        [ session ],
+        lambda msg: writes.append( msg ) or True )
+      return True
+
+    def Initialise():
+      session._connection.DoRequest( None, { 'command': 'initialize' } )
+
+    def Prepare():
+      raise KeyError( 'configuration' )
+
+    with patch.object( session, '_StartDebugAdapter', StartDebugAdapter ), \
+         patch.object( session, '_Initialise', Initialise ), \
+         patch.object( session, '_SetUpUI', lambda: None ), \
+         patch.object( session, '_Prepare', Prepare ), \
+         patch.object( session, '_StopTransport',
+                       lambda: stopped.append( True ) ):
+      with self.assertRaises( KeyError ):
+        session._StartWithConfiguration( {}, { 'command': [ 'adapter' ] } )
+
+    connection = session._connection
+    self.addCleanup( connection.Reset )
+
+    # The adapter was started, but nothing is left waiting on it
+    self.assertEqual( len( writes ), 1 )
+    self.assertIsNone( session._held_messages )
+    self.assertIsNone( connection._timeouts_paused_at )
+    self.assertIsNotNone( connection._timeout_timer )
+    self.assertEqual( stopped, [ True ] )
+
+
+  def test_PrintStats_Caches( self ):
+    session = debug_session.DebugSession( '' )
+    session._request_stats = debug_adapter_connection.RequestStats()
+    request = debug_adapter_connection.PendingRequest(
+      { 'command': 'threads' }, None, None, 1000, None )
+    session._request_stats.RecordResponse( request, True, 1.0, 20 )
+    session._outputView = MagicMock()
+
+    with patch.object( session, 'ShowOutput' ):
+      session.PrintStats()
+
+    category, lines = session._outputView.Print.call_args[ 0 ]
+    self.assertEqual( category, 'Stats' )
+    # Each memoized function's cache is shown
+    self.assertTrue( any(
+      line.startswith( 'Cache vimspector.utils._CompileTemplate: hits ' )
+      for line in lines ) )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
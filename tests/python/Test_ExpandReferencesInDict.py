@@ -1,4 +1,5 @@
 import sys
+import time
 import unittest
 from unittest.mock import patch
 from vimspector import utils
@@ -83,6 +84,29 @@ class TestExpandReferencesInDict( unittest.TestCase ):
 
     self.assertDictEqual( d, e )
 
+  def test_ExpandReferencesInString_Reused( self ):
+    # The parsed string is cached, but not the values
+    template = '$$${a} ${b:default} ${VIMSPECTOR_TEST_ENV} $VIMSPECTOR_TEST_ENV'
+    for value in ( 'one', 'two' ):
+      with patch.dict( 'os.environ', { 'VIMSPECTOR_TEST_ENV': value } ):
+        self.assertEqual(
+          utils.ExpandReferencesInString( template,
+                                          { 'a': value, 'b': value },
+                                          {},
+                                          {} ),
+          f'${ value } { value } { value } { value }' )
+
+    with patch( 'vimspector.utils.AskForInput',
+                side_effect = [ 'asked' ] ) as ask:
+      # Not in the environment any more, so it comes from the mapping
+      self.assertEqual( utils.ExpandReferencesInString(
+                          template,
+                          { 'a': 'A', 'VIMSPECTOR_TEST_ENV': 'mapped' },
+                          {},
+                          {} ),
+                        '$A asked mapped mapped' )
+      ask.assert_called_once_with( 'Enter value for b: ', 'default', 'file' )
+
   def test_ParseVariables( self ):
     tests = [
       {
@@ -120,6 +144,76 @@ class TestExpandReferencesInDict( unittest.TestCase ):
         self.assertDictEqual( utils.ParseVariables( *test[ 'in' ] ),
                               test[ 'out' ] )
 
+  def test_ParseVariables_Shell( self ):
+    def Shell( output, delay = 0.5 ):
+      return { 'shell': [ sys.executable,
+                          '-c',
+                          f'import time; time.sleep( { delay } ); '
+                          f'print( "{ output }" )' ] }
+
+    variables = [
+      {
+        'one': Shell( 'one' ),
+        'two': Shell( 'two' ),
+        'three#json': Shell( '[3]' ),
+        'same': Shell( 'shell', 0 ),
+        'same#s': 'literal',
+      },
+      {
+        # Waits for 'one', but not the others
+        'four': Shell( '${one} four' ),
+        'five': 'five, ${one}',
+        'two': Shell( 'two again' ),
+      },
+    ]
+
+    start = time.monotonic()
+    with patch( 'vimspector.utils.AskForInput', side_effect = RuntimeError ):
+      self.assertDictEqual( utils.ParseVariables( variables, {}, {}, {} ), {
+        'one': 'one',
+        'two': 'two again',
+        'three': [ 3 ],
+        'four': 'one four',
+        'five': 'five, one',
+        'same': 'literal',
+      } )
+    # Two rounds of commands, rather than five in a row
+    self.assertLess( time.monotonic() - start, 2.0 )
+
+  def test_ParseVariables_ShellCache( self ):
+    utils.ClearShellVariableCache()
+
+    def Random( name ):
+      return [ sys.executable,
+               '-c',
+               'import uuid; print( uuid.uuid4() )',
+               name ]
+
+    variables = {
+      'cached': { 'shell': Random( 'a' ), 'cache': 60 },
+      'forever': { 'shell': Random( 'b' ), 'cache': True },
+      # The same command, but a different environment
+      'other_env': { 'shell': Random( 'a' ), 'cache': 60, 'env': { 'X': '1' } },
+      'uncached': { 'shell': Random( 'c' ) },
+    }
+
+    first = utils.ParseVariables( variables, {}, {}, {} )
+    second = utils.ParseVariables( variables, {}, {}, {} )
+    self.assertEqual( first[ 'cached' ], second[ 'cached' ] )
+    self.assertEqual( first[ 'forever' ], second[ 'forever' ] )
+    self.assertEqual( first[ 'other_env' ], second[ 'other_env' ] )
+    self.assertNotEqual( first[ 'other_env' ], first[ 'cached' ] )
+    self.assertNotEqual( first[ 'uncached' ], second[ 'uncached' ] )
+
+    utils.ClearShellVariableCache()
+    third = utils.ParseVariables( variables, {}, {}, {} )
+    self.assertNotEqual( first[ 'cached' ], third[ 'cached' ] )
+
+    with patch( 'time.monotonic', return_value = time.monotonic() + 120 ):
+      fourth = utils.ParseVariables( variables, {}, {}, {} )
+    self.assertNotEqual( third[ 'cached' ], fourth[ 'cached' ] )
+    self.assertEqual( third[ 'forever' ], fourth[ 'forever' ] )
+
 
 assert unittest.main( module=__name__,
                       testRunner=unittest.TextTestRunner( sys.stdout ),
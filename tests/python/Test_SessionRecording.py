@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from vimspector import debug_adapter_connection, session_recorder
+
+REPLAY_ADAPTER = os.path.join( os.path.dirname( __file__ ),
+                               '..',
+                               '..',
+                               'support',
+                               'bin',
+                               'vimspector_replay_adapter' )
+
+
+def Frame( msg ):
+  body = json.dumps( msg )
+  return f'Content-Length: { len( body ) }\r\n\r\n{ body }'
+
+
+class Recorder( object ):
+  def __init__( self ):
+    self.events = []
+
+  def OnEvent_stopped( self, message ):
+    self.events.append( message[ 'body' ] )
+
+
+class TestSessionRecording( unittest.TestCase ):
+  def _Record( self, path ):
+    recorder = session_recorder.SessionRecorder( path, { 'name': 'test' } )
+    connection = debug_adapter_connection.DebugAdapterConnection(
+      [ Recorder() ],
+      lambda msg: True,
+      recorder = recorder )
+
+    connection.DoRequest( None, { 'command': 'threads' } )
+    connection.DoRequest( None, {
+      'command': 'scopes',
+      'arguments': { 'frameId': 1 },
+    } )
+    connection.OnData( Frame( { 'seq': 1,
+                                'type': 'response',
+                                'request_seq': 1,
+                                'command': 'scopes',
+                                'success': True,
+                                'body': { 'scopes': [ 'local' ] } } ) )
+    connection.OnData( Frame( { 'seq': 2,
+                                'type': 'response',
+                                'request_seq': 0,
+                                'command': 'threads',
+                                'success': True,
+                                'body': { 'threads': [ 'main' ] } } ) )
+    connection.OnData( Frame( { 'seq': 3,
+                                'type': 'event',
+                                'event': 'stopped',
+                                'body': { 'threadId': 1 } } ) )
+    connection.Reset()
+    recorder.Close()
+
+  def test_RecordAndReplay( self ):
+    with tempfile.TemporaryDirectory() as directory:
+      path = os.path.join( directory, 'session.jsonl' )
+      self._Record( path )
+
+      with open( path ) as f:
+        entries = [ json.loads( line ) for line in f ]
+      self.assertEqual( entries[ 0 ][ 'adapter' ], { 'name': 'test' } )
+      self.assertEqual( [ e[ 'direction' ] for e in entries[ 1 : ] ],
+                        [ 'sent', 'sent', 'received', 'received', 'received' ] )
+
+      # The requests arrive with different seqs, and in a different order
+      replies = []
+      framer = debug_adapter_connection.MessageFramer(
+        lambda message, size: replies.append( message ) )
+
+      adapter = subprocess.Popen( [ sys.executable, REPLAY_ADAPTER, path ],
+                                  stdin = subprocess.PIPE,
+                                  stdout = subprocess.PIPE,
+                                  stderr = subprocess.DEVNULL )
+      requests = [
+        { 'seq': 10,
+          'type': 'request',
+          'command': 'scopes',
+          'arguments': { 'frameId': 1 } },
+        { 'seq': 11, 'type': 'request', 'command': 'threads' },
+        { 'seq': 12, 'type': 'request', 'command': 'evaluate' },
+      ]
+      stdout, _ = adapter.communicate(
+        ''.join( Frame( r ) for r in requests ).encode( 'utf-8' ),
+        timeout = 10 )
+      framer.OnData( stdout )
+
+      self.assertEqual( adapter.returncode, 0 )
+      self.assertEqual( [ ( m[ 'type' ],
+                            m.get( 'request_seq' ),
+                            m.get( 'success' ) ) for m in replies ], [
+        ( 'response', 10, True ),
+        ( 'response', 11, True ),
+        ( 'event', None, None ),
+        ( 'response', 12, False ),
+      ] )
+      self.assertEqual( replies[ 0 ][ 'body' ], { 'scopes': [ 'local' ] } )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
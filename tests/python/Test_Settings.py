@@ -0,0 +1,45 @@
+import sys
+import unittest
+import vim
+from vimspector import settings
+
+
+class TestSettings( unittest.TestCase ):
+  def setUp( self ):
+    settings.Refresh()
+    self.addCleanup( settings.Refresh )
+
+  def _Let( self, option, value ):
+    name = f'vimspector_{ option }'
+    vim.vars[ name ] = value
+    self.addCleanup( vim.vars.__delitem__, name )
+
+  def test_Snapshot( self ):
+    self.assertEqual( settings.Int( 'bottombar_height' ), 10 )
+    self._Let( 'bottombar_height', 20 )
+    self._Let( 'sign_priority', { 'vimspectorBP': 1 } )
+
+    # The values already read are kept until a refresh
+    self.assertEqual( settings.Int( 'bottombar_height' ), 10 )
+    self.assertEqual( settings.Dict( 'sign_priority' )[ 'vimspectorBP' ], 1 )
+
+    settings.Refresh()
+    self.assertEqual( settings.Int( 'bottombar_height' ), 20 )
+    self.assertEqual( settings.Get( 'bottombar_height' ), '20' )
+
+    priority = settings.Dict( 'sign_priority' )
+    self.assertIs( settings.Dict( 'sign_priority' ), priority )
+    self.assertEqual( priority[ 'vimspectorBP' ], 1 )
+    self.assertEqual( priority[ 'vimspectorPC' ], 200 )
+
+  def test_DictDoesNotChangeDefaults( self ):
+    self._Let( 'mappings', { 'variables': { 'delete': [ 'x' ] } } )
+    self.assertEqual( settings.Dict( 'mappings' )[ 'variables' ][ 'delete' ],
+                      [ 'x' ] )
+    defaults = settings.DEFAULTS[ 'mappings' ][ 'variables' ]
+    self.assertEqual( defaults[ 'delete' ], [ '<Del>' ] )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -0,0 +1,102 @@
+import json
+import socket
+import sys
+import threading
+import time
+import unittest
+from vimspector import threaded_transport
+
+
+def Frame( msg ):
+  body = json.dumps( msg )
+  return f'Content-Length: { len( body ) }\r\n\r\n{ body }'.encode( 'utf-8' )
+
+
+class FakeAdapter( object ):
+  """Accepts one connection, answers every request with a response, and sends
+  a large event in small pieces."""
+  def __init__( self ):
+    self.listener = socket.socket()
+    self.listener.bind( ( '127.0.0.1', 0 ) )
+    self.listener.listen( 1 )
+    self.port = self.listener.getsockname()[ 1 ]
+    self.requests = []
+    self.thread = threading.Thread( target = self._Serve, daemon = True )
+    self.thread.start()
+
+  def _Serve( self ):
+    conn, _ = self.listener.accept()
+    buf = b''
+    with conn:
+      while True:
+        data = conn.recv( 4096 )
+        if not data:
+          return
+        buf += data
+        while b'\r\n\r\n' in buf:
+          header, rest = buf.split( b'\r\n\r\n', 1 )
+          length = int( header.split( b':' )[ 1 ] )
+          if len( rest ) < length:
+            break
+          request = json.loads( rest[ : length ] )
+          buf = rest[ length : ]
+          self.requests.append( request )
+
+          event = Frame( {
+            'seq': 1,
+            'type': 'event',
+            'event': 'output',
+            'body': { 'output': 'x' * 100000 },
+          } )
+          for i in range( 0, len( event ), 1000 ):
+            conn.sendall( event[ i : i + 1000 ] )
+          conn.sendall( Frame( {
+            'seq': 2,
+            'type': 'response',
+            'request_seq': request[ 'seq' ],
+            'command': request[ 'command' ],
+            'success': True,
+          } ) )
+
+
+class TestThreadedTransport( unittest.TestCase ):
+  def test_RoundTrip( self ):
+    adapter = FakeAdapter()
+    received = []
+    exits = []
+    transport = threaded_transport.ThreadedTransport(
+      lambda message, size: received.append( ( message, size ) ),
+      lambda text: None,
+      exits.append )
+    self.assertTrue( transport.Start( { 'port': adapter.port } ) )
+
+    transport.Send( Frame( {
+      'seq': 7,
+      'type': 'request',
+      'command': 'threads',
+    } ).decode( 'utf-8' ) )
+
+    deadline = time.monotonic() + 5
+    while len( received ) < 2 and time.monotonic() < deadline:
+      transport.Pump( 100 )
+
+    self.assertEqual( adapter.requests[ 0 ][ 'command' ], 'threads' )
+    self.assertEqual( [ m[ 'type' ] for m, _ in received ],
+                      [ 'event', 'response' ] )
+    self.assertEqual( len( received[ 0 ][ 0 ][ 'body' ][ 'output' ] ), 100000 )
+    self.assertEqual( received[ 1 ][ 0 ][ 'request_seq' ], 7 )
+
+    # The exit is handled later, as for Vim's jobs
+    transport.Stop()
+    self.assertEqual( exits, [] )
+    self.assertFalse( transport.Send( 'too late' ) )
+
+    deadline = time.monotonic() + 5
+    while not exits and time.monotonic() < deadline:
+      transport.Pump( 100 )
+    self.assertEqual( exits, [ 0 ] )
+
+
+assert unittest.main( module=__name__,
+                      testRunner=unittest.TextTestRunner( sys.stdout ),
+                      exit=False ).result.wasSuccessful()
@@ -32,3 +32,38 @@ function! Test_CoreUtils()
   call SkipNeovim()
   call s:RunPyFile( 'Test_CoreUtils.py' )
 endfunction
+
+function! Test_DebugAdapterConnection()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_DebugAdapterConnection.py' )
+endfunction
+
+function! Test_ThreadedTransport()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_ThreadedTransport.py' )
+endfunction
+
+function! Test_SessionRecording()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_SessionRecording.py' )
+endfunction
+
+function! Test_ConfigCache()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_ConfigCache.py' )
+endfunction
+
+function! Test_AdapterPool()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_AdapterPool.py' )
+endfunction
+
+function! Test_Settings()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_Settings.py' )
+endfunction
+
+function! Test_DebugSession()
+  call SkipNeovim()
+  call s:RunPyFile( 'Test_DebugSession.py' )
+endfunction